@@ -0,0 +1,368 @@
+"""
+Asynchronous HTTP API for the generation pipeline, next to the Streamlit UI.
+
+A plain ASGI application without framework dependencies; serve it with any
+ASGI server, e.g.:
+
+    uvicorn api:app --port 8000
+
+Endpoints:
+    POST /jobs                  start a job, returns {"job_id": ...}
+    GET  /jobs/{id}             job status
+    GET  /jobs/{id}/events      progress as server-sent events
+    GET  /jobs/{id}/package     the finished .h5p package
+    GET  /packages              packages in the artifact store, if configured
+    GET  /packages/{id}         a stored package, streamed from its blobs
+    GET  /metrics               Prometheus metrics
+    GET  /healthz               liveness check
+
+New jobs are rejected with 429 while $H5P_API_MAX_PENDING_JOBS (default 100)
+jobs are queued or running.
+
+Connections are handled on the event loop; only the blocking pipeline work
+runs in a bounded thread pool, so waiting clients do not hold threads.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import app as pipeline
+from artifact_store import get_artifact_store
+from llm_backends import BACKENDS, LLM_BACKEND_ENV, get_backend
+from locales import DEFAULT_LOCALE
+from metrics import metrics
+from resources import available_locales
+from transcripts import AUTO_LANGUAGE
+from youtube_url import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = ('mcq', 'glossary', 'drag')
+
+# YouTube transcript language codes, e.g. "de", "en-US" or "zh-Hans"
+_LANGUAGE_RE = re.compile(r"^[a-z]{2,3}(-[A-Za-z0-9]{2,8})*$")
+
+# Finished jobs are dropped after this long, or when there are too many
+JOB_TTL_SECONDS = 3600
+MAX_JOBS = 1000
+
+
+class Job:
+    """State and progress events of one generation request."""
+
+    def __init__(self, request: dict):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = 'queued'
+        self.error = None
+        self.results = None
+        self.package_id = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._changed = asyncio.Event()
+
+    def publish(self, event: str, **data):
+        """Record a progress event; must be called on the event loop."""
+        self.events.append({'event': event, 'time': time.time(), **data})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_events(self, seen: int):
+        if len(self.events) <= seen:
+            await self._changed.wait()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('finished', 'failed')
+
+    def summary(self) -> dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'topic': (self.results or {}).get('topic'),
+            'package_id': self.package_id,
+            'created': self.created,
+            'finished': self.finished,
+            'events': len(self.events),
+        }
+
+
+class GenerationAPI:
+    """
+    ASGI application. Jobs use the LLM backend named in the request (default
+    $H5P_LLM_BACKEND); `client_factory(api_key)`, if given, overrides it and
+    returns an OpenAI-compatible client or LLMBackend.
+    """
+
+    def __init__(self, client_factory=None, max_workers: int = None, max_pending: int = None):
+        self.client_factory = client_factory
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.environ.get("H5P_API_WORKERS", "4")),
+            thread_name_prefix="h5p-job"
+        )
+        self.max_pending = max_pending or int(os.environ.get("H5P_API_MAX_PENDING_JOBS", "100"))
+        self.jobs = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks = set()
+
+    # ASGI plumbing
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        try:
+            await self._route(scope, receive, send)
+        except Exception as e:
+            logger.error(f"Unhandled API error: {e}")
+            await self._json(send, 500, {'error': str(e)})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive) -> bytes:
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    async def _send(self, send, status: int, body: bytes, content_type: str, headers: list = None):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())] + (headers or []),
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _stream(self, send, chunks, content_type: str, headers: list = None):
+        """Send an iterator of byte chunks, reading each one off the event loop."""
+        loop = asyncio.get_running_loop()
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', content_type.encode())] + (headers or []),
+        })
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _json(self, send, status: int, payload: dict):
+        await self._send(send, status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    async def _route(self, scope, receive, send):
+        method = scope['method']
+        parts = [part for part in scope['path'].split('/') if part]
+
+        if parts == ['healthz'] and method == 'GET':
+            await self._json(send, 200, {'status': 'ok'})
+        elif parts == ['metrics'] and method == 'GET':
+            await self._send(send, 200, metrics.render_prometheus().encode(), 'text/plain; version=0.0.4')
+        elif parts == ['jobs'] and method == 'POST':
+            headers = dict(scope.get('headers') or [])
+            await self._create_job(await self._read_body(receive), headers, send)
+        elif len(parts) >= 2 and parts[0] == 'jobs' and method == 'GET':
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await self._json(send, 404, {'error': 'Unknown job'})
+            elif len(parts) == 2:
+                await self._json(send, 200, job.summary())
+            elif parts[2:] == ['events']:
+                await self._stream_events(job, send)
+            elif parts[2:] == ['package']:
+                await self._send_package(job, send)
+            else:
+                await self._json(send, 404, {'error': 'Not found'})
+        elif parts[:1] == ['packages'] and len(parts) <= 2 and method == 'GET':
+            store = get_artifact_store()
+            if store is None:
+                await self._json(send, 404, {'error': 'No artifact store configured'})
+            elif len(parts) == 1:
+                await self._json(send, 200, {'packages': store.list_packages()})
+            else:
+                await self._send_stored_package(store, parts[1], send)
+        else:
+            await self._json(send, 404, {'error': 'Not found'})
+
+    # Handlers
+
+    async def _create_job(self, body: bytes, headers: dict, send):
+        try:
+            request = json.loads(body or b'{}')
+            extract_video_id(request.get('url', ''))
+        except Exception as e:
+            await self._json(send, 400, {'error': f"Invalid request: {str(e)}"})
+            return
+
+        content_types = request.get('content_types') or list(CONTENT_TYPES)
+        unknown = set(content_types) - set(CONTENT_TYPES)
+        if unknown:
+            await self._json(send, 400, {'error': f"Unknown content types: {', '.join(sorted(unknown))}"})
+            return
+
+        backend = request.get('backend') or os.environ.get(LLM_BACKEND_ENV, 'openai')
+        if backend not in BACKENDS:
+            await self._json(send, 400, {'error': f"Unknown backend: {backend}"})
+            return
+
+        authorization = headers.get(b'authorization', b'').decode()
+        api_key = (authorization[7:] if authorization.lower().startswith('bearer ') else None) \
+            or request.get('api_key') or os.environ.get('OPENAI_API_KEY')
+        language = request.get('language', 'en')
+        if not isinstance(language, str) or (language != AUTO_LANGUAGE and not _LANGUAGE_RE.match(language)):
+            await self._json(send, 400, {'error': f"Invalid transcript language: {language}"})
+            return
+
+        locale = request.get('locale', DEFAULT_LOCALE)
+        if locale not in available_locales():
+            await self._json(send, 400, {'error': f"Unknown locale: {locale}, "
+                                                  f"available: {', '.join(available_locales())}"})
+            return
+
+        if backend == 'openai' and not api_key:
+            await self._json(send, 401, {'error': 'An OpenAI API key is required'})
+            return
+
+        self._expire_jobs()
+        pending = sum(1 for job in self.jobs.values() if not job.done)
+        if pending >= self.max_pending:
+            await self._json(send, 429, {'error': f"Too many pending jobs ({pending}), try again later"})
+            return
+
+        job = Job({
+            'url': request['url'],
+            'language': language,
+            'model': request.get('model', 'gpt-4o-mini'),
+            'content_types': content_types,
+            'locale': locale,
+            'backend': backend,
+        })
+        self.jobs[job.id] = job
+        job.publish('queued')
+        task = asyncio.get_running_loop().create_task(self._run_job(job, api_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        await self._json(send, 202, {'job_id': job.id})
+
+    async def _stream_events(self, job: Job, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')],
+        })
+        seen = 0
+        while True:
+            while seen < len(job.events):
+                event = job.events[seen]
+                seen += 1
+                payload = f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                await send({'type': 'http.response.body', 'body': payload.encode('utf-8'), 'more_body': True})
+            if job.done:
+                break
+            await job.wait_for_events(seen)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _send_package(self, job: Job, send):
+        if job.status == 'failed':
+            await self._json(send, 409, {'error': job.error})
+        elif job.package_id is not None:
+            await self._send_stored_package(get_artifact_store(), job.package_id, send)
+        elif job.results is None:
+            await self._json(send, 409, {'error': f"Job is {job.status}"})
+        else:
+            # Only the results are kept per job, the package is rebuilt from the template on download
+            package = await asyncio.get_running_loop().run_in_executor(None, pipeline.package_results, job.results)
+            file_name = pipeline.package_filename(job.results.get('topic', 'unit'))
+            await self._send(send, 200, package, 'application/zip',
+                             [(b'content-disposition', f'attachment; filename="{file_name}"'.encode('utf-8'))])
+
+    async def _send_stored_package(self, store, package_id: str, send):
+        try:
+            manifest = store.get_manifest(package_id)
+        except Exception as e:
+            await self._json(send, 404, {'error': str(e)})
+            return
+        file_name = manifest.get('file_name') or f"{package_id}.h5p"
+        await self._stream(send, store.iter_package(package_id), 'application/zip',
+                           [(b'content-length', str(manifest['size']).encode()),
+                            (b'content-disposition', f'attachment; filename="{file_name}"'.encode('utf-8'))])
+
+    # Pipeline
+
+    async def _run_job(self, job: Job, api_key: str):
+        loop = asyncio.get_running_loop()
+        request = job.request
+
+        def progress(event: str, **data):
+            loop.call_soon_threadsafe(lambda: job.publish(event, **data))
+
+        def work():
+            with metrics.collect() as timings:
+                # generate_unit fetches the transcript itself, and only on a result store miss
+                progress('generating', content_types=request['content_types'], backend=request['backend'])
+                client = self.client_factory(api_key) if self.client_factory \
+                    else get_backend(request['backend'], api_key)
+                _, results = pipeline.generate_unit(
+                    client, request['url'], request['language'], request['model'],
+                    generate_mcq='mcq' in request['content_types'],
+                    generate_glossary='glossary' in request['content_types'],
+                    generate_drag='drag' in request['content_types'],
+                    locale=request['locale']
+                )
+
+                progress('packaging', topic=results.get('topic'))
+                # With an artifact store the package is served from its blobs
+                package_id = pipeline.archive_results(results)
+            return results, package_id, timings
+
+        job.status = 'running'
+        try:
+            job.results, job.package_id, timings = await loop.run_in_executor(self.executor, work)
+            job.status = 'finished'
+            job.publish('finished', topic=job.results.get('topic'), package_id=job.package_id, timings=timings)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+            job.publish('failed', error=str(e))
+        finally:
+            job.finished = time.time()
+            metrics.increment('h5p_api_jobs_total', status=job.status)
+            metrics.write_file()
+
+    def _expire_jobs(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.done and now - job.finished > JOB_TTL_SECONDS:
+                del self.jobs[job_id]
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.finished)
+        for job in finished[:max(0, len(self.jobs) - MAX_JOBS)]:
+            del self.jobs[job.id]
+
+
+def create_app(client_factory=None, max_workers: int = None, max_pending: int = None) -> GenerationAPI:
+    return GenerationAPI(client_factory=client_factory, max_workers=max_workers, max_pending=max_pending)
+
+
+app = create_app()
@@ -1,142 +1,193 @@
+from __future__ import annotations
+
 import streamlit as st
-from youtube_transcript_api import YouTubeTranscriptApi
-from openai import OpenAI
 import logging
 import json
 import zipfile
 import io
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+import time
+from metrics import metrics, timed
+from h5p_import import import_h5p_package
+from question_filter import filter_questions, filter_glossary, top_up_instruction
+from artifact_store import get_artifact_store
+from result_store import get_result_store, make_key, make_translation_key
+from session_store import SessionData, get_session_store
+from resources import TEMPLATE_ZIP_PATH, load_prompt, prompt_versions, load_h5p_skeleton, template_base, prebuild_template, load_locale, locale_catalog, available_locales
+from locales import DEFAULT_LOCALE, normalize_text, translate_texts
+from llm_backends import LLM_BACKEND_ENV, RECORDED_RESPONSES_ENV, as_backend, get_backend
+from transcripts import get_transcript_text, prefetch_transcripts
+from playlist import expand_videos
+from youtube_url import canonical_url, extract_video_id, same_video
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of MCQs the prompt asks for (4 'Erinnern' + 4 'Verstehen')
+TARGET_QUESTION_COUNT = 8
+
+# The generator prompts and system messages produce German content; packages in
+# other locales are translated from this analysis by localize_results
+ANALYSIS_LOCALE = DEFAULT_LOCALE
+
 def extract_transcript(url: str, language: str = "en") -> str:
     """
     Extract transcript from a YouTube video in a specified language.
+    "auto" uses the language the video was recorded in.
     """
     try:
-        video_id = url.split("v=")[-1]
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-
-        # Try fetching the transcript in the requested language
-        if language in transcript_list:
-            transcript = transcript_list.find_transcript([language]).fetch()
-        else:
-            transcript = transcript_list.find_transcript([language]).translate(language).fetch()
-
-        cleaned_transcript = " ".join([entry['text'] for entry in transcript])
-        return cleaned_transcript
+        video_id = extract_video_id(url)
+        with metrics.stage("transcript_fetch", language=language):
+            # Picks the cheapest path: manual before generated, direct before translated
+            return get_transcript_text(video_id, language)
 
     except Exception as e:
         logger.error(f"Error extracting YouTube transcript: {e}")
         st.error(f"Could not extract transcript: {e}")
         return ""
 
-def get_ai_analysis(client: OpenAI, transcript: str, prompt: str) -> str:
+def get_ai_analysis(client: OpenAI, transcript: str, prompt: str, model: str = "gpt-4o-mini",
+                    kind: str = "analysis") -> str:
     """
-    Generate AI analysis of the transcript using OpenAI API.
+    Generate AI analysis of the transcript with the LLM backend (an OpenAI client
+    or any LLMBackend). `kind` labels the call in the metrics (mcq, glossary, drag, ...).
     """
     try:
+        backend = as_backend(client)
         full_prompt = f"{prompt}\n\nTranscript:\n{transcript}"
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        start = time.perf_counter()
+        completion = backend.complete(
+            [
                 {"role": "user", "content": full_prompt}
-            ]
+            ],
+            model, kind=kind
         )
-        return response.choices[0].message.content.strip()
+        metrics.record_llm_call(kind, backend.model_id(model), time.perf_counter() - start, completion)
+        return completion.content.strip()
     except Exception as e:
         logger.error(f"Error generating AI analysis: {e}")
         raise Exception(f"Failed to generate AI analysis: {str(e)}")
 
-def clean_text(text: str) -> str:
+def clean_text(text: str, locale: str = DEFAULT_LOCALE) -> str:
     """Clean up text by replacing special characters."""
-    return text.replace('ß', 'ss')
+    return normalize_text(text, locale)
+
+def build_multichoice(question_text: str, answers: list, locale: str = DEFAULT_LOCALE) -> dict:
+    """
+    Build one H5P.MultiChoice question with the UI strings of `locale`.
+    `answers` holds (text, is_correct, feedback) tuples.
+    """
+    catalog = locale_catalog(locale)['multichoice']
+    return {
+        "library": "H5P.MultiChoice 1.16",
+        "params": {
+            "question": clean_text(question_text, locale),
+            "answers": [
+                {
+                    "text": clean_text(text, locale),
+                    "correct": is_correct,
+                    "tipsAndFeedback": {
+                        "tip": "",
+                        "chosenFeedback": clean_text(feedback, locale),
+                        "notChosenFeedback": ""
+                    }
+                } for text, is_correct, feedback in answers
+            ],
+            "behaviour": {
+                "singleAnswer": True,
+                "enableRetry": True,
+                "enableSolutionsButton": True,
+                "enableCheckButton": True,
+                "type": "auto",
+                "singlePoint": False,
+                "randomAnswers": True,
+                "showSolutionsRequiresInput": True,
+                "confirmCheckDialog": False,
+                "confirmRetryDialog": False,
+                "autoCheck": False,
+                "passPercentage": 100,
+                "showScorePoints": True
+            },
+            "media": {"disableImageZooming": False},
+            "overallFeedback": [{"from": 0, "to": 100}],
+            "UI": dict(catalog['UI']),
+            "confirmCheck": dict(catalog['confirmCheck']),
+            "confirmRetry": dict(catalog['confirmRetry'])
+        },
+        "subContentId": str(uuid.uuid4()),
+        "metadata": {
+            "contentType": "Multiple Choice",
+            "license": "U",
+            "title": catalog['title'],
+            "authors": [],
+            "changes": [],
+            "extraTitle": catalog['title']
+        }
+    }
+
+def build_dragtext(lines: list, task_description_key: str, locale: str = DEFAULT_LOCALE) -> dict:
+    """
+    Build H5P.DragText params with the UI strings of `locale`.
+    `task_description_key` is 'dragTaskDescription' or 'glossaryTaskDescription'.
+    """
+    catalog = locale_catalog(locale)
+    ui = catalog['dragtext']
+    return {
+        "media": {
+            "disableImageZooming": False
+        },
+        "taskDescription": catalog[task_description_key],
+        "overallFeedback": [
+            {"from": 0, "to": 100}
+        ],
+        "checkAnswer": ui['checkAnswer'],
+        "submitAnswer": ui['submitAnswer'],
+        "tryAgain": ui['tryAgain'],
+        "showSolution": ui['showSolution'],
+        "dropZoneIndex": ui['dropZoneIndex'],
+        "empty": ui['empty'],
+        "contains": ui['contains'],
+        "ariaDraggableIndex": ui['ariaDraggableIndex'],
+        "tipLabel": ui['tipLabel'],
+        "correctText": ui['correctText'],
+        "incorrectText": ui['incorrectText'],
+        "resetDropTitle": ui['resetDropTitle'],
+        "resetDropDescription": ui['resetDropDescription'],
+        "grabbed": ui['grabbed'],
+        "cancelledDragging": ui['cancelledDragging'],
+        "correctAnswer": ui['correctAnswer'],
+        "feedbackHeader": ui['feedbackHeader'],
+        "behaviour": {
+            "enableRetry": True,
+            "enableSolutionsButton": False,
+            "enableCheckButton": True,
+            "instantFeedback": False
+        },
+        "scoreBarLabel": ui['scoreBarLabel'],
+        "a11yCheck": ui['a11yCheck'],
+        "a11yShowSolution": ui['a11yShowSolution'],
+        "a11yRetry": ui['a11yRetry'],
+        # Join all sentences with line breaks
+        "textField": "\n".join(clean_text(line, locale) for line in lines)
+    }
 
-def transform_mcq(json_str: str) -> list:
+@timed("transform_mcq")
+def transform_mcq(json_str: str, locale: str = DEFAULT_LOCALE) -> list:
     """Transform MCQ JSON to H5P-compatible question list."""
     try:
         data = json.loads(json_str)
         questions = []
 
         for q in data.get('questions_list', []):
-            question = {
-                "library": "H5P.MultiChoice 1.16",
-                "params": {
-                    "question": clean_text(q['question_text']),
-                    "answers": [
-                        {
-                            "text": clean_text(answer['text']),
-                            "correct": answer['is_correct'],
-                            "tipsAndFeedback": {
-                                "tip": "",
-                                "chosenFeedback": clean_text(answer['feedback']),
-                                "notChosenFeedback": ""
-                            }
-                        } for answer in q['answers']
-                    ],
-                    "behaviour": {
-                        "singleAnswer": True,
-                        "enableRetry": True,
-                        "enableSolutionsButton": True,
-                        "enableCheckButton": True,
-                        "type": "auto",
-                        "singlePoint": False,
-                        "randomAnswers": True,
-                        "showSolutionsRequiresInput": True,
-                        "confirmCheckDialog": False,
-                        "confirmRetryDialog": False,
-                        "autoCheck": False,
-                        "passPercentage": 100,
-                        "showScorePoints": True
-                    },
-                    "media": {"disableImageZooming": False},
-                    "overallFeedback": [{"from": 0, "to": 100}],
-                    "UI": {
-                        "checkAnswerButton": "Überprüfen",
-                        "submitAnswerButton": "Absenden",
-                        "showSolutionButton": "Lösung anzeigen",
-                        "tryAgainButton": "Wiederholen",
-                        "tipsLabel": "Hinweis anzeigen",
-                        "scoreBarLabel": "Du hast :num von :total Punkten erreicht.",
-                        "tipAvailable": "Hinweis verfügbar",
-                        "feedbackAvailable": "Rückmeldung verfügbar",
-                        "readFeedback": "Rückmeldung vorlesen",
-                        "wrongAnswer": "Falsche Antwort",
-                        "correctAnswer": "Richtige Antwort",
-                        "shouldCheck": "Hätte gewählt werden müssen",
-                        "shouldNotCheck": "Hätte nicht gewählt werden sollen",
-                        "noInput": "Bitte antworte, bevor du die Lösung ansiehst",
-                        "a11yCheck": "Die Antworten überprüfen. Die Auswahlen werden als richtig, falsch oder fehlend markiert.",
-                        "a11yShowSolution": "Die Lösung anzeigen. Die richtigen Lösungen werden in der Aufgabe angezeigt.",
-                        "a11yRetry": "Die Aufgabe wiederholen. Alle Versuche werden zurückgesetzt und die Aufgabe wird erneut gestartet."
-                    },
-                    "confirmCheck": {
-                        "header": "Beenden?",
-                        "body": "Ganz sicher beenden?",
-                        "cancelLabel": "Abbrechen",
-                        "confirmLabel": "Beenden"
-                    },
-                    "confirmRetry": {
-                        "header": "Wiederholen?",
-                        "body": "Ganz sicher wiederholen?",
-                        "cancelLabel": "Abbrechen",
-                        "confirmLabel": "Bestätigen"
-                    }
-                },
-                "subContentId": str(uuid.uuid4()),
-                "metadata": {
-                    "contentType": "Multiple Choice",
-                    "license": "U",
-                    "title": "Unbenannt: Multiple Choice",
-                    "authors": [],
-                    "changes": [],
-                    "extraTitle": "Unbenannt: Multiple Choice"
-                }
-            }
-            questions.append(question)
+            answers = [(answer['text'], answer['is_correct'], answer['feedback']) for answer in q['answers']]
+            questions.append(build_multichoice(q['question_text'], answers, locale))
 
         return questions
     except json.JSONDecodeError as e:
@@ -146,7 +197,8 @@ def transform_mcq(json_str: str) -> list:
         logger.error(f"Error transforming MCQ: {e}")
         raise Exception(f"Failed to transform MCQ format: {str(e)}")
 
-def transform_drag(drag_str: str) -> dict:
+@timed("transform_drag")
+def transform_drag(drag_str: str, locale: str = DEFAULT_LOCALE) -> dict:
     """Transform drag words text to H5P-compatible format."""
     try:
         data = json.loads(drag_str)
@@ -156,47 +208,8 @@ def transform_drag(drag_str: str) -> dict:
         
         if not drag_content:
             raise Exception("No drag words content found in the response")
-            
-        # Join all sentences with line breaks
-        text_field = "\n".join(clean_text(text) for text in drag_content)
-        
-        return {
-            "media": {
-                "disableImageZooming": False
-            },
-            "taskDescription": "Ziehe die Wörter in die richtigen Felder!",
-            "overallFeedback": [
-                {"from": 0, "to": 100}
-            ],
-            "checkAnswer": "Überprüfen",
-            "submitAnswer": "Absenden",
-            "tryAgain": "Wiederholen",
-            "showSolution": "Lösung anzeigen",
-            "dropZoneIndex": "Ablagefeld @index.",
-            "empty": "Ablagefeld @index ist leer.",
-            "contains": "Ablagefeld @index enthält ziehbaren Text @draggable.",
-            "ariaDraggableIndex": "@index von @count ziehbaren Texten.",
-            "tipLabel": "Tipp anzeigen",
-            "correctText": "Richtig!",
-            "incorrectText": "Falsch!",
-            "resetDropTitle": "Ablagefelder zurücksetzen",
-            "resetDropDescription": "Bist du sicher, dass du dieses Ablagefeld zurücksetzen möchtest?",
-            "grabbed": "Ziehbarer Text wurde aufgenommen.",
-            "cancelledDragging": "Ziehen abgebrochen.",
-            "correctAnswer": "Korrekte Antwort:",
-            "feedbackHeader": "Rückmeldung",
-            "behaviour": {
-                "enableRetry": True,
-                "enableSolutionsButton": False,
-                "enableCheckButton": True,
-                "instantFeedback": False
-            },
-            "scoreBarLabel": "Du hast :num von :total Punkten erreicht.",
-            "a11yCheck": "Die Antworten überprüfen. Die Eingaben werden als richtig, falsch oder unbeantwortet markiert.",
-            "a11yShowSolution": "Die Lösung anzeigen. Die richtigen Lösungen werden in der Aufgabe angezeigt.",
-            "a11yRetry": "Die Aufgabe wiederholen. Alle Eingaben werden zurückgesetzt und die Aufgabe wird erneut gestartet.",
-            "textField": text_field
-        }
+
+        return build_dragtext(drag_content, 'dragTaskDescription', locale)
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing drag words JSON: {e}")
         logger.error(f"Received content: {drag_str}")
@@ -206,7 +219,8 @@ def transform_drag(drag_str: str) -> dict:
         logger.error(f"Received content: {drag_str}")
         raise Exception(f"Failed to transform drag words format: {str(e)}")
 
-def transform_glossary(glossary_str: str) -> dict:
+@timed("transform_glossary")
+def transform_glossary(glossary_str: str, locale: str = DEFAULT_LOCALE) -> dict:
     """Transform glossary text to H5P-compatible format."""
     try:
         data = json.loads(glossary_str)
@@ -217,48 +231,9 @@ def transform_glossary(glossary_str: str) -> dict:
         if not glossary_content:
             logger.error(f"Received glossary content: {glossary_str}")
             raise Exception("No glossary content found in the response")
-            
-        # Format the text field with the glossary entries
-        text_field = "\n".join(clean_text(entry) for entry in glossary_content)
-        
+
         # Return the complete H5P DragText parameters
-        return {
-            "media": {
-                "disableImageZooming": False
-            },
-            "taskDescription": "Ordne die Begriffe den richtigen Definitionen zu!",
-            "overallFeedback": [
-                {"from": 0, "to": 100}
-            ],
-            "checkAnswer": "Überprüfen",
-            "submitAnswer": "Absenden",
-            "tryAgain": "Wiederholen",
-            "showSolution": "Lösung anzeigen",
-            "dropZoneIndex": "Ablagefeld @index.",
-            "empty": "Ablagefeld @index ist leer.",
-            "contains": "Ablagefeld @index enthält ziehbaren Text @draggable.",
-            "ariaDraggableIndex": "@index von @count ziehbaren Texten.",
-            "tipLabel": "Tipp anzeigen",
-            "correctText": "Richtig!",
-            "incorrectText": "Falsch!",
-            "resetDropTitle": "Ablagefelder zurücksetzen",
-            "resetDropDescription": "Bist du sicher, dass du dieses Ablagefeld zurücksetzen möchtest?",
-            "grabbed": "Ziehbarer Text wurde aufgenommen.",
-            "cancelledDragging": "Ziehen abgebrochen.",
-            "correctAnswer": "Korrekte Antwort:",
-            "feedbackHeader": "Rückmeldung",
-            "behaviour": {
-                "enableRetry": True,
-                "enableSolutionsButton": False,
-                "enableCheckButton": True,
-                "instantFeedback": False
-            },
-            "scoreBarLabel": "Du hast :num von :total Punkten erreicht.",
-            "a11yCheck": "Die Antworten überprüfen. Die Eingaben werden als richtig, falsch oder unbeantwortet markiert.",
-            "a11yShowSolution": "Die Lösung anzeigen. Die richtigen Lösungen werden in der Aufgabe angezeigt.",
-            "a11yRetry": "Die Aufgabe wiederholen. Alle Eingaben werden zurückgesetzt und die Aufgabe wird erneut gestartet.",
-            "textField": text_field
-        }
+        return build_dragtext(glossary_content, 'glossaryTaskDescription', locale)
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing glossary JSON: {e}")
         logger.error(f"Received content: {glossary_str}")
@@ -268,42 +243,32 @@ def transform_glossary(glossary_str: str) -> dict:
         logger.error(f"Received content: {glossary_str}")
         raise Exception(f"Failed to transform glossary format: {str(e)}")
 
-def get_welcome_message(client: OpenAI, transcript: str) -> tuple[str, str]:
-    """Generate a welcome message based on the video transcript. Returns (welcome_text, topic)."""
+def get_welcome_message(client: OpenAI, transcript: str, model: str = "gpt-4o-mini",
+                        version: str = None) -> tuple[str, str]:
+    """
+    Generate a welcome message based on the video transcript. Returns (welcome_text, topic).
+    `version` selects the welcome prompt, the manifest version by default.
+    """
     try:
-        # Modified prompt to be more explicit and structured
-        prompt = """Analyze this transcript and provide:
-1. A concise topic title (maximum 5 words)
-2. A welcome message in HTML format that includes:
-   - Brief introduction
-   - 3 bullet points on why this topic is important
-   - 3 bullet points on learning objectives
-
-Format your response EXACTLY like this example:
-{
-    "topic": "Introduction to Quantum Physics",
-    "welcome_html": "<p>Willkommen zu dieser Einheit über Quantenphysik!</p><h3>❗ Wieso ist es wichtig?</h3><ul><li>Point 1</li><li>Point 2</li><li>Point 3</li></ul><h3>🎯 Lernziele</h3><ul><li>Objective 1</li><li>Objective 2</li><li>Objective 3</li></ul>"
-}
-
-Transcript:
-"""
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        backend = as_backend(client)
+        start = time.perf_counter()
+        completion = backend.complete(
+            [
                 {"role": "system", "content": "You are a helpful assistant that generates structured educational content in German. Always respond with valid JSON."},
-                {"role": "user", "content": prompt + transcript}
+                {"role": "user", "content": load_prompt("welcome", version) + transcript}
             ],
+            model, kind="welcome",
             temperature=0.7,  # Add some creativity while maintaining coherence
             max_tokens=1000   # Ensure enough space for the response
         )
+        metrics.record_llm_call("welcome", backend.model_id(model), time.perf_counter() - start, completion)
         
         try:
             # Get the response content
-            content = response.choices[0].message.content.strip()
+            content = completion.content.strip()
             
             # Log the raw response for debugging
-            logger.info(f"OpenAI response: {content}")
+            logger.debug(f"OpenAI response: {content}")
             
             # Try to parse the JSON
             result = json.loads(content)
@@ -331,32 +296,25 @@ Transcript:
         st.error(f"Failed to generate welcome message: {str(e)}")
         return None, None
 
-def create_content_json(video_url: str, mcq_content: str = None, glossary_content: str = None, drag_content: str = None, welcome_text: str = None) -> str:
-    """Create the content.json structure based on the generated content."""
+@timed("build_content_json")
+def create_content_json(video_url: str, mcq_content: str = None, glossary_content: str = None, drag_content: str = None, welcome_text: str = None, locale: str = DEFAULT_LOCALE) -> str:
+    """Create the content.json structure based on the generated content, with the UI strings of `locale`."""
+    catalog = load_locale(locale)
+    column = catalog['column']
+    question_set = catalog['questionSet']
     content_json = {
         "content": [
             # Welcome Message
             {
                 "content": {
                     "params": {
-                        "text": welcome_text if welcome_text else "<p>Willkommen zu dieser Einheit! Bitte schaue dir das Video an und beantworte anschließend die Fragen unten.</p>"
-                                "<h3>❗ Wieso ist es wichtig?</h3>"
-                                "<ul>"
-                                "<li>Es hilft, das Thema besser zu verstehen.</li>"
-                                "<li>Fördert kritisches Denken.</li>"
-                                "<li>Bereitet auf Prüfungen vor.</li>"
-                                "</ul>"
-                                "<h3>Lernziele</h3>"
-                                "<ul>"
-                                "<li>Verstehen der Grundkonzepte.</li>"
-                                "<li>Anwenden des Gelernten in praktischen Beispielen.</li>"
-                                "</ul>"
+                        "text": welcome_text if welcome_text else column['defaultWelcome']
                     },
                     "library": "H5P.AdvancedText 1.1",
                     "metadata": {
                         "contentType": "Text",
                         "license": "U",
-                        "title": "Unbenannt: Text",
+                        "title": column['textTitle'],
                         "authors": [],
                         "changes": []
                     },
@@ -376,21 +334,7 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                             "autoplay": False,
                             "loop": False
                         },
-                        "l10n": {
-                            "name": "Video",
-                            "loading": "Videoplayer lädt...",
-                            "noPlayers": "Keine Videoplayer gefunden, die das vorliegende Videoformat unterstützen.",
-                            "noSources": "Es wurden für das Video keine Quellen angegeben.",
-                            "aborted": "Das Abspielen des Videos wurde abgebrochen.",
-                            "networkFailure": "Netzwerkfehler.",
-                            "cannotDecode": "Dekodierung des Mediums nicht möglich.",
-                            "formatNotSupported": "Videoformat wird nicht unterstützt.",
-                            "mediaEncrypted": "Medium verschlüsselt.",
-                            "unknownError": "Unbekannter Fehler.",
-                            "invalidYtId": "Ungültige YouTube-ID.",
-                            "unknownYtId": "Video mit dieser YouTube-ID konnte nicht gefunden werden.",
-                            "restrictedYt": "Der Besitzer dieses Videos erlaubt kein Einbetten."
-                        },
+                        "l10n": catalog['video']['l10n'],
                         "sources": [
                             {
                                 "path": video_url,
@@ -406,10 +350,10 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                     "metadata": {
                         "contentType": "Video",
                         "license": "U",
-                        "title": "Unbenannt: Video",
+                        "title": catalog['video']['title'],
                         "authors": [],
                         "changes": [],
-                        "extraTitle": "Unbenannt: Video"
+                        "extraTitle": catalog['video']['title']
                     },
                     "subContentId": "9897af8b-60d1-4d11-a5e4-21694eab09ce"
                 },
@@ -419,13 +363,13 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
             {
                 "content": {
                     "params": {
-                        "text": "<h3>Verständnisfragen</h3>"
+                        "text": column['questionsHeader']
                     },
                     "library": "H5P.AdvancedText 1.1",
                     "metadata": {
                         "contentType": "Text",
                         "license": "U",
-                        "title": "Unbenannt: Text",
+                        "title": column['textTitle'],
                         "authors": [],
                         "changes": []
                     },
@@ -443,7 +387,7 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                 "params": {
                     "introPage": {
                         "showIntroPage": False,
-                        "startButtonText": "Quiz starten",
+                        "startButtonText": question_set['startButtonText'],
                         "introduction": ""
                     },
                     "progressType": "dots",
@@ -454,34 +398,21 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                         "showResultPage": True,
                         "showSolutionButton": True,
                         "showRetryButton": True,
-                        "noResultMessage": "Quiz beendet",
-                        "message": "Dein Ergebnis:",
-                        "scoreBarLabel": "Du hast @score von @total Punkten erreicht.",
+                        "noResultMessage": question_set['endGame']['noResultMessage'],
+                        "message": question_set['endGame']['message'],
+                        "scoreBarLabel": question_set['endGame']['scoreBarLabel'],
                         "overallFeedback": [
                             {"from": 0, "to": 100}
                         ],
-                        "solutionButtonText": "Lösung anzeigen",
-                        "retryButtonText": "Wiederholen",
-                        "finishButtonText": "Beenden",
-                        "submitButtonText": "Absenden",
+                        "solutionButtonText": question_set['endGame']['solutionButtonText'],
+                        "retryButtonText": question_set['endGame']['retryButtonText'],
+                        "finishButtonText": question_set['endGame']['finishButtonText'],
+                        "submitButtonText": question_set['endGame']['submitButtonText'],
                         "showAnimations": False,
                         "skippable": False,
-                        "skipButtonText": "Video überspringen"
-                    },
-                    "texts": {
-                        "prevButton": "Zurück",
-                        "nextButton": "Weiter",
-                        "finishButton": "Beenden",
-                        "submitButton": "Absenden",
-                        "textualProgress": "Aktuelle Frage: @current von @total Fragen",
-                        "jumpToQuestion": "Frage %d von %total",
-                        "questionLabel": "Frage",
-                        "readSpeakerProgress": "Frage @current von @total",
-                        "unansweredText": "Unbeantwortet",
-                        "answeredText": "Beantwortet",
-                        "currentQuestionText": "Aktuelle Frage",
-                        "navigationLabel": "Fragen"
+                        "skipButtonText": question_set['endGame']['skipButtonText']
                     },
+                    "texts": question_set['texts'],
                     "override": {
                         "checkButton": True,
                         "showSolutionButton": "off",
@@ -494,10 +425,10 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                 "metadata": {
                     "contentType": "Question Set",
                     "license": "U",
-                    "title": "Multiple Choice Fragen",
+                    "title": column['mcqTitle'],
                     "authors": [],
                     "changes": [],
-                    "extraTitle": "Multiple Choice Fragen"
+                    "extraTitle": column['mcqTitle']
                 },
                 "subContentId": "ffae1922-ba4b-43b2-b3a0-3e776817fc58"
             },
@@ -513,10 +444,10 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                 "metadata": {
                     "contentType": "Drag the Words",
                     "license": "U",
-                    "title": "Lückentext",
+                    "title": column['dragTitle'],
                     "authors": [],
                     "changes": [],
-                    "extraTitle": "Lückentext"
+                    "extraTitle": column['dragTitle']
                 },
                 "subContentId": "ca61533c-d106-410f-929b-c223a852c995"
             },
@@ -532,10 +463,10 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
                 "metadata": {
                     "contentType": "Drag the Words",
                     "license": "U",
-                    "title": "Glossar",
+                    "title": column['glossaryTitle'],
                     "authors": [],
                     "changes": [],
-                    "extraTitle": "Glossar"
+                    "extraTitle": column['glossaryTitle']
                 },
                 "subContentId": "a203f8b4-8c1e-448a-9cd5-7e81cc413ba5"
             },
@@ -544,48 +475,333 @@ def create_content_json(video_url: str, mcq_content: str = None, glossary_conten
 
     return json.dumps(content_json, ensure_ascii=False, indent=2)
 
-def create_h5p_json(topic: str) -> str:
+@timed("build_h5p_json")
+def create_h5p_json(topic: str, locale: str = DEFAULT_LOCALE) -> str:
     """Create the h5p.json structure with the given topic."""
-    h5p_json = {
-        "embedTypes": ["iframe"],
-        "language": "de",
-        "defaultLanguage": "de",
-        "license": "U",
-        "extraTitle": topic,
-        "title": topic,
-        "mainLibrary": "H5P.Column",
-        "preloadedDependencies": [
-            {"machineName": "H5P.AdvancedText", "majorVersion": 1, "minorVersion": 1},
-            {"machineName": "H5P.Video", "majorVersion": 1, "minorVersion": 6},
-            {"machineName": "H5P.MultiChoice", "majorVersion": 1, "minorVersion": 16},
-            {"machineName": "FontAwesome", "majorVersion": 4, "minorVersion": 5},
-            {"machineName": "H5P.JoubelUI", "majorVersion": 1, "minorVersion": 3},
-            {"machineName": "H5P.Transition", "majorVersion": 1, "minorVersion": 0},
-            {"machineName": "H5P.FontIcons", "majorVersion": 1, "minorVersion": 0},
-            {"machineName": "H5P.Question", "majorVersion": 1, "minorVersion": 5},
-            {"machineName": "H5P.QuestionSet", "majorVersion": 1, "minorVersion": 20},
-            {"machineName": "H5P.DragText", "majorVersion": 1, "minorVersion": 10},
-            {"machineName": "jQuery.ui", "majorVersion": 1, "minorVersion": 10},
-            {"machineName": "H5P.Column", "majorVersion": 1, "minorVersion": 18}
-        ]
-    }
+    h5p_json = load_h5p_skeleton()
+    h5p_json["language"] = locale
+    h5p_json["defaultLanguage"] = locale
+    h5p_json["title"] = topic
+    h5p_json["extraTitle"] = topic
     return json.dumps(h5p_json, ensure_ascii=False)
 
+@timed("build_zip")
+def build_h5p_package(content_json_str: str, h5p_json_str: str, template_zip_path: str = TEMPLATE_ZIP_PATH) -> bytes:
+    """Assemble the .h5p package from the template libraries and the generated JSON files."""
+    # Append to a copy of the prebuilt template, the library files are not recompressed
+    buffer = io.BytesIO(template_base(template_zip_path))
+    with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as zip_new:
+        zip_new.writestr('content/content.json', content_json_str)
+        zip_new.writestr('h5p.json', h5p_json_str)
+
+    return buffer.getvalue()
+
+def results_json(results: dict) -> tuple[str, str]:
+    """content.json and h5p.json strings for a results structure."""
+    locale = results.get('locale', DEFAULT_LOCALE)
+    content_json_str = create_content_json(
+        video_url=results.get('url', ''),
+        mcq_content=results.get('mcq'),
+        glossary_content=results.get('glossary'),
+        drag_content=results.get('drag'),
+        welcome_text=results.get('welcome'),
+        locale=locale
+    )
+    h5p_json_str = create_h5p_json(results.get('topic', 'Unbenannte Einheit'), locale)
+    return content_json_str, h5p_json_str
+
+def package_results(results: dict) -> bytes:
+    """Build the complete .h5p package for a results structure."""
+    return build_h5p_package(*results_json(results))
+
+def archive_results(results: dict) -> str | None:
+    """
+    Keep the package of a results structure in the artifact store, if one is
+    configured ($H5P_ARTIFACT_STORE_DIR). Returns the package id.
+    """
+    store = get_artifact_store()
+    if store is None:
+        return None
+    with metrics.stage("archive"):
+        return store.put_generated(*results_json(results), file_name=package_filename(results.get('topic', 'unit')))
+
+def package_filename(topic: str) -> str:
+    """File name of a package, derived from its topic."""
+    clean_filename = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return clean_filename.replace(' ', '_') + ".h5p"
+
+def generate_results(client: OpenAI, transcript: str, url: str, generate_mcq: bool = False,
+                     generate_glossary: bool = False, generate_drag: bool = False,
+                     previous: dict = None, model: str = "gpt-4o-mini", locale: str = DEFAULT_LOCALE,
+                     prompts: dict = None) -> dict:
+    """
+    Run the LLM generators for the selected content types and return the results
+    structure consumed by create_content_json, with the UI strings of `locale`.
+    Sections in `previous` (e.g. from an imported package) are reused when they
+    belong to the same video. `prompts` maps prompt names to versions that
+    override the manifest, e.g. {'mcq': 'v2'} for an evaluation run.
+    """
+    if not previous or not same_video(previous.get('url', ''), url):
+        previous = {}
+    prompts = prompts or {}
+
+    # Generate welcome message and topic
+    if previous.get('welcome') and previous.get('topic'):
+        welcome_text, topic = previous['welcome'], previous['topic']
+    else:
+        welcome_text, topic = get_welcome_message(client, transcript, model, prompts.get("welcome"))
+        if welcome_text is None or topic is None:
+            st.warning("Using default welcome message and topic")
+            column = locale_catalog(locale)['column']
+            welcome_text = column['fallbackWelcome']
+            topic = column['fallbackTopic']
+        else:
+            st.success("Welcome message and topic generated successfully")
+
+    # Generate selected content types
+    mcq_content = previous.get('mcq')
+    glossary_content = previous.get('glossary')
+    drag_content = previous.get('drag')
+
+    if generate_mcq:
+        mcq_raw = get_ai_analysis(client, transcript, load_prompt("mcq", prompts.get("mcq")), model, kind="mcq")
+        mcq_content, deficit = filter_questions(transform_mcq(mcq_raw, locale), TARGET_QUESTION_COUNT)
+
+        # Ask only for the missing questions instead of rerunning the whole set
+        if deficit:
+            logger.info(f"Requesting {deficit} additional questions")
+            # Best effort, the filtered questions are kept if the top-up fails
+            try:
+                top_up_raw = get_ai_analysis(client, transcript, load_prompt("mcq", prompts.get("mcq")) + top_up_instruction(deficit, mcq_content),
+                                             model, kind="mcq_top_up")
+                mcq_content, deficit = filter_questions(
+                    mcq_content + transform_mcq(top_up_raw, locale)[:deficit], TARGET_QUESTION_COUNT
+                )
+            except Exception as e:
+                logger.error(f"Question top-up failed: {e}")
+        if deficit:
+            st.warning(f"Only {len(mcq_content)} distinct questions could be generated")
+
+    if generate_glossary:
+        glossary_raw = get_ai_analysis(client, transcript, load_prompt("glossary", prompts.get("glossary")), model, kind="glossary")
+        logger.debug(f"Raw glossary response: {glossary_raw}")
+        glossary_content, removed = filter_glossary(transform_glossary(glossary_raw, locale))
+        if removed:
+            logger.info(f"Removed {removed} duplicate glossary entries")
+
+    if generate_drag:
+        drag_raw = get_ai_analysis(client, transcript, load_prompt("drag", prompts.get("drag")), model, kind="drag")
+        drag_content = transform_drag(drag_raw, locale)
+
+    return {
+        'mcq': mcq_content,
+        'glossary': glossary_content,
+        'drag': drag_content,
+        'welcome': welcome_text,
+        'topic': topic,
+        # Stored and embedded without tracking or playlist parameters, e.g. ?si= or &list=
+        'url': canonical_url(url),
+        'locale': locale
+    }
+
+def localize_results(client: OpenAI, results: dict, locale: str, model: str = "gpt-4o-mini") -> dict:
+    """
+    Produce the results of another locale from an existing analysis: the content
+    text is translated in a single batched LLM call and the H5P structures are
+    rebuilt with the UI strings of `locale`. No generator prompt is run again.
+    """
+    texts = []
+
+    def add(text: str) -> int:
+        texts.append(text)
+        return len(texts) - 1
+
+    topic_index = add(results.get('topic') or "")
+    welcome_index = add(results['welcome']) if results.get('welcome') else None
+    mcq_plan = [
+        (add(q['params']['question']),
+         [(add(a['text']), a['correct'], add(a['tipsAndFeedback']['chosenFeedback'])) for a in q['params']['answers']])
+        for q in results.get('mcq') or []
+    ]
+    drag_plan = [add(line) for line in results['drag']['textField'].split("\n")] if results.get('drag') else None
+    glossary_plan = [add(line) for line in results['glossary']['textField'].split("\n")] if results.get('glossary') else None
+
+    translated = translate_texts(client, texts, locale, model)
+
+    return {
+        'mcq': [
+            build_multichoice(translated[question], [(translated[text], correct, translated[feedback])
+                                                     for text, correct, feedback in answers], locale)
+            for question, answers in mcq_plan
+        ] or None,
+        'glossary': build_dragtext([translated[i] for i in glossary_plan], 'glossaryTaskDescription', locale)
+                    if glossary_plan else None,
+        'drag': build_dragtext([translated[i] for i in drag_plan], 'dragTaskDescription', locale)
+                if drag_plan else None,
+        'welcome': translated[welcome_index] if welcome_index is not None else None,
+        'topic': clean_text(translated[topic_index], locale),
+        'url': results.get('url', ''),
+        'locale': locale
+    }
+
+def localize_unit(client: OpenAI, results: dict, locale: str, model: str = "gpt-4o-mini") -> dict:
+    """
+    localize_results through the shared result store: every session asking for
+    the same results in the same locale shares a single translation call.
+    """
+    if results.get('locale', ANALYSIS_LOCALE) == locale:
+        return results
+    model_id = as_backend(client).model_id(model)
+    # Shared between callers regardless of their URL, e.g. its start time
+    content = {name: value for name, value in results.items() if name != 'url'}
+    key = make_translation_key(content, locale, model_id, prompt_version())
+    localized, outcome = get_result_store().get_or_compute(key, lambda: localize_results(client, content, locale, model))
+    metrics.increment('h5p_result_store_requests_total', outcome=outcome)
+    if outcome != 'miss':
+        metrics.record_llm_cache_hit('translate', model_id)
+    return {**localized, 'url': results.get('url', '')}
+
+def generate_localized_results(client: OpenAI, results: dict, locales: list, model: str = "gpt-4o-mini") -> dict:
+    """Localize one analysis into several locales in parallel. Returns {locale: results}."""
+    localized = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(locales))) as executor:
+        futures = {locale: executor.submit(localize_unit, client, results, locale, model) for locale in locales}
+        for locale, future in futures.items():
+            try:
+                localized[locale] = future.result()
+            except Exception as e:
+                logger.error(f"Localization to {locale} failed: {e}")
+                localized[locale] = None
+    return localized
+
+
+def prompt_version() -> str:
+    """Versions of the generator prompts, part of the result store key."""
+    return ",".join(f"{name}:{version}" for name, version in sorted(prompt_versions().items()))
+
+def generate_unit(client: OpenAI, url: str, language: str, model: str = "gpt-4o-mini",
+                  generate_mcq: bool = False, generate_glossary: bool = False,
+                  generate_drag: bool = False, locale: str = DEFAULT_LOCALE) -> tuple[str, dict]:
+    """
+    Fetch the transcript and generate a complete unit, returning (transcript, results).
+    Served from the shared result store; identical concurrent requests wait on
+    a single computation instead of each calling YouTube and OpenAI. The unit is
+    generated once in ANALYSIS_LOCALE and translated into `locale` if that differs.
+    """
+    content_types = [name for name, selected in
+                     [('mcq', generate_mcq), ('glossary', generate_glossary), ('drag', generate_drag)] if selected]
+    # Keyed on the video ID, so youtu.be, shorts and watch URLs share one entry;
+    # the model id keeps units of the offline backends apart from OpenAI ones
+    model_id = as_backend(client).model_id(model)
+    video_id = extract_video_id(url)
+    key = make_key(video_id, language, model_id, content_types, prompt_version())
+
+    def compute():
+        transcript = extract_transcript(url, language)
+        if not transcript:
+            raise Exception("Failed to extract transcript")
+        # Stored without a start time, every caller gets its own one back below
+        results = generate_results(client, transcript, f"https://www.youtube.com/watch?v={video_id}",
+                                   generate_mcq=generate_mcq,
+                                   generate_glossary=generate_glossary, generate_drag=generate_drag,
+                                   model=model, locale=ANALYSIS_LOCALE)
+        return {'transcript': transcript, 'results': results}
+
+    def complete(unit: dict) -> bool:
+        # Units with the fallback welcome or too few questions are retried, not shared
+        results = unit['results']
+        if results['topic'] == locale_catalog(ANALYSIS_LOCALE)['column']['fallbackTopic']:
+            return False
+        return not generate_mcq or len(results['mcq'] or []) >= TARGET_QUESTION_COUNT
+
+    unit, outcome = get_result_store().get_or_compute(key, compute, cacheable=complete)
+    metrics.increment('h5p_result_store_requests_total', outcome=outcome)
+    if outcome != 'miss':
+        logger.info(f"Result store {outcome} for {url}")
+        for kind in ['welcome'] + content_types:
+            metrics.record_llm_cache_hit(kind, model_id)
+    results = localize_unit(client, unit['results'], locale, model)
+    return unit['transcript'], {**results, 'url': canonical_url(url)}
+
+def regenerate_sections(client: OpenAI, transcript: str, url: str, previous: dict, model: str = "gpt-4o-mini",
+                        generate_mcq: bool = False, generate_glossary: bool = False,
+                        generate_drag: bool = False, locale: str = DEFAULT_LOCALE) -> dict:
+    """
+    Regenerate the selected sections of imported results and keep the others.
+    The new sections are generated in ANALYSIS_LOCALE like every unit and then
+    translated, so the whole package ends up in `locale`.
+    """
+    sections = [name for name, selected in
+                [('mcq', generate_mcq), ('glossary', generate_glossary), ('drag', generate_drag)] if selected]
+    kept = {**previous, **{name: None for name in sections}}
+    if kept.get('locale', DEFAULT_LOCALE) != locale:
+        kept = localize_results(client, kept, locale, model)
+    # Without an imported welcome message a new one is generated with the sections
+    new_welcome = not (kept.get('welcome') and kept.get('topic'))
+
+    results = generate_results(client, transcript, url, generate_mcq=generate_mcq,
+                               generate_glossary=generate_glossary, generate_drag=generate_drag,
+                               previous=kept, model=model, locale=ANALYSIS_LOCALE)
+    if locale != ANALYSIS_LOCALE:
+        generated = {name: results[name] for name in sections}
+        if new_welcome:
+            generated.update(welcome=results['welcome'], topic=results['topic'])
+        translated = localize_results(client, {'url': results['url'], **generated}, locale, model)
+        results.update({name: translated[name] for name in generated})
+    return {**results, 'locale': locale}
+
 def main():
     st.set_page_config(page_title="YouTube Content Analyzer", page_icon="🎥")
+    prebuild_template()
     
+    # Transcripts, results and packages live in the session store, which spills
+    # large payloads to disk; st.session_state only holds the session handle
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    session = SessionData(get_session_store(), st.session_state.session_id)
+
     # Initialize session state for results if not exists
-    if 'results' not in st.session_state:
-        st.session_state.results = {}
-    if 'transcript' not in st.session_state:
-        st.session_state.transcript = ""
+    if 'results' not in session:
+        session.results = {}
+    if 'transcript' not in session:
+        session.transcript = ""
+    if 'timings' not in st.session_state:
+        st.session_state.timings = []
+    if 'localized' not in session:
+        session.localized = {}
     
     # Sidebar
     with st.sidebar:
         st.title("⚙️ Settings")
+        # The offline backends generate without network access, e.g. for load tests or outages
+        backends = {'openai': "OpenAI", 'local': "Local (offline)"}
+        if os.environ.get(RECORDED_RESPONSES_ENV):
+            backends['recorded'] = "Recorded responses"
+        default_backend = os.environ.get(LLM_BACKEND_ENV, 'openai')
+        backend_name = st.selectbox(
+            "Generation Backend",
+            options=list(backends),
+            index=list(backends).index(default_backend) if default_backend in backends else 0,
+            format_func=backends.get
+        )
         api_key = st.text_input("OpenAI API Key", type="password")
-        if api_key:
-            client = OpenAI(api_key=api_key)
+
+        st.markdown("---")
+        st.markdown("### Edit Existing Package")
+        uploaded_package = st.file_uploader("Import .h5p package", type=["h5p"])
+        if uploaded_package is not None:
+            package_key = f"{uploaded_package.name}:{uploaded_package.size}"
+            # Only import once per upload, not on every rerun
+            if st.session_state.get('imported_package') != package_key:
+                try:
+                    imported = import_h5p_package(uploaded_package)
+                    # Only imported sections are kept on regeneration, see the Generate button
+                    imported['imported'] = True
+                    session.results = imported
+                    st.session_state.imported_package = package_key
+                    st.success("Package imported. Select only the sections you want to regenerate.")
+                except Exception as e:
+                    st.error(f"Could not import package: {str(e)}")
         
         st.markdown("---")
         st.markdown("### About")
@@ -602,7 +818,11 @@ def main():
     st.markdown("### Transform video content into H5P Column with Q&A")
     
     # Input section
-    url = st.text_input("YouTube Video URL", placeholder="https://www.youtube.com/watch?v=example")
+    url = st.text_input(
+        "YouTube Video URL",
+        value=session.results.get('url', ''),
+        placeholder="https://www.youtube.com/watch?v=example"
+    )
     
     col1, col2 = st.columns(2)
     with col1:
@@ -618,6 +838,24 @@ def main():
             options=["gpt-4o-mini", "gpt-4o"],
             index=0
         )
+
+    locales = available_locales()
+    current_locale = session.results.get('locale', DEFAULT_LOCALE)
+    col1, col2 = st.columns(2)
+    with col1:
+        locale = st.selectbox(
+            "Package Language",
+            options=locales,
+            index=locales.index(current_locale if current_locale in locales else DEFAULT_LOCALE),
+            help="Content is generated in German and translated into other languages"
+        )
+
+    with col2:
+        # Translated from the same analysis, the generators are not run again
+        extra_locales = st.multiselect(
+            "Additional Translated Packages",
+            options=[code for code in locales if code != locale]
+        )
     
     # Content type selection
     st.markdown("### Select Content Types to Generate")
@@ -625,212 +863,88 @@ def main():
     generate_glossary = st.checkbox("Glossary")
     generate_drag = st.checkbox("Drag The Words")
 
-    # Store prompts in variables (hidden from UI)
-    mcq_prompt = """//goal
-- you are specialized in generating multiple choice questions tailored to the format outlined below.
-- you answer in the same language as the input.
-- You focus on clarity and relevance for 15-20 years old students in switzerland, avoiding overly complex language and providing outputs ready for immediate use.
-
-//steps
-1. The user uploads the transcript of a video.
-2. read the text and identify key topics to be understood
-3. read the instructions below
-4. generate 4 multiple choice questions level 'Erinnern' according to the 'bloom_levels_closed' guidelines in the same language as the user's input.
-5. generate 4 multiple choice questions level 'Verstehen' according to the 'bloom_levels_closed' guidelines in the same language as the user's input.
-6. You always answer in German per 'Sie-Form' or in the Language of the upload
-7. refer to the 'templates_closed' for rendering output.
-
-//output
-- OUTPUT include the generated questions
-- STRICTLY follow the formatting of the 'templates_closed'
-- IMPORTANT: the output is just the json schema.
-
-//bloom_levels_closed 
-# Bloom Level: 'Erinnern'
-Question Type: For recall-based tasks
-Design Approach:
-Focus on recognition and recall of facts.
-Use straightforward questions that require identification of correct information.
-
-# Bloom Level: 'Verstehen'
-Question Type: Questions at this level assess comprehension and interpretation
-Design Approach:
-Emphasize explanation of ideas or concepts.
-Questions should assess comprehension through interpretation or summary.
-
-//rules
-- Each question has ALWAYS 3 Answers
-- there are 1 or 2 correct answers
-- All the answers have a feedback.
-- Generate plausible incorrect answers.
-- feedback_correct contain additional information with a real life example in two short sentences with bold key terms for enhanced readability between **. E.g. this is a **bold term**
-- feedback_wrong contain the correct answer inclusive and an explanation in one sentence, why it is the correct one with bold key terms for enhanced readability between **. E.g. this is a **bold term**
-- Use an empty line to separate each question.
-- ALWAYS generate for each textblock one multiple choice question for each level according to the 'bloom_levels_closed' 
-
-Please generate a list of questions in the following structure:
-
-{
-  "questions_list": [
-    {
-      "bloom_level": "Erinnern",
-      "question_text": "What is the capital of France?",
-      "answers": [
-        {
-          "text": "Paris",
-          "is_correct": true,
-          "feedback": "✅ Paris is the correct answer."
-        },
-        {
-          "text": "London",
-          "is_correct": false,
-          "feedback": "❌ London is incorrect. The correct answer is Paris."
-        }
-      ]
-    }
-  ]
-}
-
-Ensure that each item in the list has:
-- A **bloom_level** string (e.g., "Erinnern").
-- A **question_text** string.
-- An **answers** array containing multiple answers, with each answer having **text**, **is_correct**, and **feedback** fields.
-
-//templates_closed
-{
-  "questions_list": [
-    {
-      "bloom_level": "Erinnern",  // Bloom Level 'Erinnern' - Recall-based task
-      "question_text": "{{question_text_erinnern}}",  // Text of the recall question
-      "answers": [
-        {
-          "text": "{{correct_answer_1}}",  // Correct answer text
-          "is_correct": true,  // Indicates this is the correct answer
-          "feedback": "✅ {{feedback_correct_1}}"  // Feedback for the correct answer, explaining why it's correct with additional information and **bold** keywords
-        },
-        {
-          "text": "{{wrong_answer_1}}",  // Plausible wrong answer 1
-          "is_correct": false,  // Indicates this is an incorrect answer
-          "feedback": "❌ {{feedback_wrong_1}}"  // Feedback for the wrong answer, explaining why it's wrong and including the correct answer and **bold** keywords
-        },
-        {
-          "text": "{{wrong_answer_2}}",  // Plausible wrong answer 2
-          "is_correct": false,  // Indicates this is an incorrect answer
-          "feedback": "❌ {{feedback_wrong_2}}"  // Feedback for the wrong answer, explaining why it's wrong and including the correct answer and **bold** keywords
-        }
-      ]
-      // Instruction: Generate three more 'Erinnern' level questions.
-      // Each question should focus on recall-based tasks, ensuring students can recognize and recall factual information from the text.
-      // For each question, provide 1 or 2 correct answers and plausible wrong answers, ensuring the feedback follows the same format.
-    },
-    {
-      "bloom_level": "Verstehen",  // Bloom Level 'Verstehen' - Comprehension-based task
-      "question_text": "{{question_text_verstehen}}",  // Text of the comprehension question
-      "answers": [
-        {
-          "text": "{{correct_answer_2}}",  // Correct answer text
-          "is_correct": true,  // Indicates this is the correct answer
-          "feedback": "✅ {{feedback_correct_2}}"  // Feedback for the correct answer, explaining why it's correct with additional information and **bold** keywords
-        },
-        {
-          "text": "{{wrong_answer_3}}",  // Plausible wrong answer 3
-          "is_correct": false,  // Indicates this is an incorrect answer
-          "feedback": "❌ {{feedback_wrong_3}}"  // Feedback for the wrong answer, explaining why it's wrong and including the correct answer and **bold** keywords
-        },
-        {
-          "text": "{{wrong_answer_4}}",  // Plausible wrong answer 4
-          "is_correct": false,  // Indicates this is an incorrect answer
-          "feedback": "❌ {{feedback_wrong_4}}"  // Feedback for the wrong answer, explaining why it's wrong and including the correct answer and **bold** keywords
-        }
-      ]
-      // Instruction: Generate three more 'Verstehen' level questions.
-      // Focus on questions that assess the students' comprehension of concepts.
-      // Provide 1 or 2 correct answers and plausible wrong answers, ensuring feedback clearly explains why the answers are correct or incorrect, using real-life examples when relevant.
-    }
-  ]
-}
-"""
-
-    glossary_prompt = """//goal
-You are specialized in creating glossary for Swiss students aged 15 to 20, based on the levels of Bloom's Taxonomy and according to the format 'templatesH5P.txt'.
-You answer in the same language of the user.
-
-//assignment
-- Your main task is to analyze texts provided by users, extract the main keywords for the understanding of the video, and generate suitable glossary, as desired by the user.
-- You strictly follow the formatting rules from 'templatesH5P.txt', including specific feedback and textual hints for glossary and drag the wordsquestions.
-
-//output
-- The output consists exclusively of formatted texts strictly adhering to the 'templatesH5P.txt' standards, without additional explanations.
-- You always respond in the language of the input text. The interaction style is clear and precise, focused on the exact compliance with the given format, suitable for an educational environment.
-
-//'templatesH5P.txt'
-{
-  "glossary": {
-    "output_template": [
-      "*term1:hint for term1*: Definition of term1",
-      "*term2:hint for term2*: Definition of term2",
-      "*term3:hint for term3*: Definition of term3"
-    ]
-  }
-}
-
-//output_example
-{
-  "glossary": {
-    "output_example": [
-      "*photosynthesis:Process plants use to convert sunlight into energy*: The process by which green plants and some other organisms use sunlight to synthesize foods from carbon dioxide and water.",
-      "*mitochondria:Organelle known as the powerhouse of the cell*: A membrane-bound organelle found in the cytoplasm of eukaryotic cells that produces energy in the form of ATP.",
-      "*ecosystem:Interaction of living organisms and their environment*: A biological community of interacting organisms and their physical environment."
-    ]
-  }
-}
-"""
-
-    drag_prompt = """//goal
-You are specialized in creating educational drag the words for Swiss students aged 15 to 20, based on the levels of Bloom's Taxonomy and according to the format 'templatesH5P.txt'.
-You answer in the same language of the user.
-
-//assignment
-- Your main task is to analyze texts provided by users, extract the main information, and generate suitable drag the words texts as desired by the user.
-- The texts check various levels of 'Bloom's Taxonomy'.
-- You strictly follow the formatting rules from 'templatesH5P.txt', including textual hints and drag the words texts.
-
-//Bloom's Taxonomy
-- Level 1 Knowledge: Learners reproduce what they have previously learned. The examination material had to be memorized or practiced.
-- Level 2 Understanding: Learners demonstrate understanding by having the learned material present in a context that differs from the context in which it was learned.
-- Level 3 Application: Learners apply something learned in a new situation. This application situation has not occurred before.
-- Level 4 Analysis: Learners break down models, procedures, or others into their components. They must discover the principles of structure or internal structures in complex situations. They recognize relationships.
-
-//output
-- The output consists exclusively of formatted texts strictly adhering to the 'templatesH5P.txt' standards, without additional explanations, Bloom levels, or types of questions.
-- You always respond in the language of the input text. The interaction style is clear and precise, focused on the exact compliance with the given format, suitable for an educational environment.
-
-//'templatesH5P.txt'
-{
-  "drag_the_words": {
-    "output_template": [
-      "Sentence with *word1:hint for word1*, followed by *word2:hint for word2*, and *word3:hint for word3*."
-    ]
-  }
-}
-
-//output_example
-{
-  "drag_the_words": {
-    "output_example": [
-      "In the United States, the Government includes three distinct branches: the *legislative:Which branch is the U.S. Congress part of?*, the Executive headed by the *President:Who leads the executive branch?*, and the judicial branch, which includes the *Supreme Court:What is the highest court in the United States?*.",
-      "The water cycle involves processes such as *evaporation:What is the process of water turning into vapor?*, *condensation:What happens when water vapor cools and forms clouds?*, and *precipitation:What is the term for rain, snow, sleet, or hail falling from the sky?*."
-    ]
-  }
-}
-"""
+    # Batch generation for whole playlists or channels
+    with st.expander("📚 Playlist / Channel"):
+        playlist_url = st.text_input("Playlist or Channel URL", placeholder="https://www.youtube.com/playlist?list=example")
+
+        if st.button("🔎 Load Videos"):
+            try:
+                video_ids = expand_videos(playlist_url)
+                progress = st.progress(0.0, text="Prefetching transcripts...")
+                finished = []
+
+                def on_done(video_id, error):
+                    finished.append(video_id)
+                    progress.progress(len(finished) / len(video_ids), text=f"Prefetched {len(finished)}/{len(video_ids)}")
+
+                # All transcripts are fetched up front so the LLM stage never waits on YouTube
+                errors = prefetch_transcripts(video_ids, language, on_done=on_done)
+                st.session_state.batch_videos = [video_id for video_id in video_ids if errors[video_id] is None]
+                session.batch_zip = None
+
+                failed = [video_id for video_id in video_ids if errors[video_id] is not None]
+                if failed:
+                    st.warning(f"No transcript for {len(failed)} videos: {', '.join(failed)}")
+            except Exception as e:
+                st.error(f"Could not load playlist: {str(e)}")
+
+        batch_videos = st.session_state.get('batch_videos', [])
+        if batch_videos:
+            st.info(f"{len(batch_videos)} videos ready for generation")
+
+            if st.button("🚀 Generate All"):
+                if backend_name == 'openai' and not api_key:
+                    st.error("Please enter your OpenAI API key")
+                elif not any([generate_mcq, generate_glossary, generate_drag]):
+                    st.error("Please select at least one content type to generate")
+                else:
+                    client = get_backend(backend_name, api_key)
+                    progress = st.progress(0.0, text="Generating...")
+                    packages = {}
+                    for index, video_id in enumerate(batch_videos):
+                        try:
+                            _, results = generate_unit(
+                                client, f"https://www.youtube.com/watch?v={video_id}", language, model,
+                                generate_mcq=generate_mcq,
+                                generate_glossary=generate_glossary,
+                                generate_drag=generate_drag,
+                                locale=locale
+                            )
+                            packages[f"{video_id}_{package_filename(results['topic'])}"] = package_results(results)
+                            archive_results(results)
+                        except Exception as e:
+                            st.warning(f"Generation failed for {video_id}: {str(e)}")
+                        progress.progress((index + 1) / len(batch_videos), text=f"Generated {index + 1}/{len(batch_videos)}")
+                    metrics.write_file()
+
+                    buffer = io.BytesIO()
+                    # The packages are zip files already, storing them avoids compressing twice
+                    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as batch_zip:
+                        for file_name, package in packages.items():
+                            batch_zip.writestr(file_name, package)
+                    try:
+                        # Built once, the single archive is all that is kept for the session
+                        session.batch_zip = buffer.getvalue() if packages else None
+                        st.session_state.batch_count = len(packages)
+                    except Exception as e:
+                        st.error(f"Could not keep the packages: {str(e)}")
+
+        # The archive stays spilled on disk until it is actually requested
+        if 'batch_zip' in session and st.button(f"📦 Prepare All H5P Packages ({st.session_state.get('batch_count', 0)})"):
+            st.download_button(
+                label=f"📥 All H5P Packages ({st.session_state.get('batch_count', 0)})",
+                data=session.batch_zip,
+                file_name="h5p_packages.zip",
+                mime="application/zip",
+                key="download_batch"
+            )
 
     # Process button
     if st.button("🚀 Generate Content"):
         if not url:
             st.error("Please enter a YouTube URL")
             return
-        if not api_key:
+        if backend_name == 'openai' and not api_key:
             st.error("Please enter your OpenAI API key")
             return
         if not any([generate_mcq, generate_glossary, generate_drag]):
@@ -838,88 +952,86 @@ You answer in the same language of the user.
             return
             
         try:
-            with st.spinner("Processing content..."):
-                # Extract transcript
-                st.session_state.transcript = extract_transcript(url, language)
-                if not st.session_state.transcript:
-                    st.error("Failed to extract transcript")
-                    return
-
-                # Generate welcome message and topic
-                welcome_text, topic = get_welcome_message(client, st.session_state.transcript)
-                if welcome_text is None or topic is None:
-                    st.warning("Using default welcome message and topic")
-                    welcome_text = "<p>Willkommen zu dieser Einheit!</p>"
-                    topic = "Unbenannte Einheit"
+            # Imported here so that plain reruns never load the OpenAI SDK
+            client = get_backend(backend_name, api_key)
+
+            with st.spinner("Processing content..."), metrics.collect() as timings:
+                st.session_state.timings = timings
+                previous = session.results
+
+                if previous.get('imported') and same_video(previous.get('url', ''), url):
+                    # Sections of an imported package for the same video are kept,
+                    # only the selected content types are regenerated
+                    session.transcript = extract_transcript(url, language)
+                    if not session.transcript:
+                        st.error("Failed to extract transcript")
+                        return
+
+                    session.results = regenerate_sections(
+                        client, session.transcript, url, previous, model,
+                        generate_mcq=generate_mcq,
+                        generate_glossary=generate_glossary,
+                        generate_drag=generate_drag,
+                        locale=locale
+                    )
+                    source = session.results
+                    # Still an edit of the imported package, later runs keep its sections too
+                    session.results = {**session.results, 'imported': True}
                 else:
-                    st.success("Welcome message and topic generated successfully")
-
-                # Generate selected content types
-                mcq_content = None
-                glossary_content = None
-                drag_content = None
-
-                if generate_mcq:
-                    mcq_raw = get_ai_analysis(client, st.session_state.transcript, mcq_prompt)
-                    mcq_content = transform_mcq(mcq_raw)
-
-                if generate_glossary:
-                    glossary_raw = get_ai_analysis(client, st.session_state.transcript, glossary_prompt)
-                    logger.info(f"Raw glossary response: {glossary_raw}")
-                    glossary_content = transform_glossary(glossary_raw)
-
-                if generate_drag:
-                    drag_raw = get_ai_analysis(client, st.session_state.transcript, drag_prompt)
-                    drag_content = transform_drag(drag_raw)
-
-                # Store results in session state
-                st.session_state.results = {
-                    'mcq': mcq_content,
-                    'glossary': glossary_content,
-                    'drag': drag_content,
-                    'welcome': welcome_text,
-                    'topic': topic,  # Store topic in session state
-                    'url': url
-                }
+                    # Fresh units are shared with every other session asking for the same video;
+                    # the analysis is generated once and every package language translated from it
+                    session.transcript, source = generate_unit(
+                        client, url, language, model,
+                        generate_mcq=generate_mcq,
+                        generate_glossary=generate_glossary,
+                        generate_drag=generate_drag,
+                        locale=ANALYSIS_LOCALE
+                    )
+                    session.results = localize_unit(client, source, locale, model)
+
+                # One batched translation call per additional locale, all in parallel
+                session.localized = {}
+                st.session_state.localized_locales = []
+                if extra_locales:
+                    session.localized = generate_localized_results(
+                        client, source, extra_locales, model
+                    )
+                    failed = [code for code, localized in session.localized.items() if localized is None]
+                    if failed:
+                        st.warning(f"Translation failed for: {', '.join(failed)}")
+                    st.session_state.localized_locales = [code for code in extra_locales if code not in failed]
+
+                # Generated packages are kept deduplicated if an artifact store is configured
+                for results in [session.results, *session.localized.values()]:
+                    if results:
+                        archive_results(results)
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
             return
+        finally:
+            metrics.write_file()
+
+    # Read once per rerun, spilled payloads are loaded from disk
+    results = session.results
 
-    # Initialize transformed_content dictionary
-    transformed_content = {}
-    
-    # Check and add MCQ content if available
-    if 'mcq' in st.session_state.results and st.session_state.results['mcq']:
-        transformed_content['mcq'] = json.dumps(st.session_state.results['mcq'], indent=2)
-    
-    # Check and add Glossary content if available
-    if 'glossary' in st.session_state.results and st.session_state.results['glossary']:
-        transformed_content['glossary'] = json.dumps(st.session_state.results['glossary'], indent=2)
-    
-    # Check and add Drag Words content if available
-    if 'drag' in st.session_state.results and st.session_state.results['drag']:
-        transformed_content['drag'] = json.dumps(st.session_state.results['drag'], indent=2)
-    
-    # Display results if they exist
-    template_zip_path = "path/to/your/template.zip"  # Update this path accordingly
-    
-    # Check and add content for the H5P package
     # Display results if they exist
-    if st.session_state.results and any(st.session_state.results.values()):
+    if results and any(results.values()):
         st.success("Content generated successfully!")
         
         # Generate content.json and h5p.json
         try:
             content_json_str = create_content_json(
-                video_url=st.session_state.results.get('url', ''),
-                mcq_content=st.session_state.results.get('mcq'),
-                glossary_content=st.session_state.results.get('glossary'),
-                drag_content=st.session_state.results.get('drag'),
-                welcome_text=st.session_state.results.get('welcome')
+                video_url=results.get('url', ''),
+                mcq_content=results.get('mcq'),
+                glossary_content=results.get('glossary'),
+                drag_content=results.get('drag'),
+                welcome_text=results.get('welcome'),
+                locale=results.get('locale', DEFAULT_LOCALE)
             )
             
-            h5p_json_str = create_h5p_json(st.session_state.results.get('topic', 'Unbenannte Einheit'))
+            h5p_json_str = create_h5p_json(results.get('topic', 'Unbenannte Einheit'),
+                                           results.get('locale', DEFAULT_LOCALE))
         except Exception as e:
             st.error(f"Failed to create H5P JSON: {str(e)}")
             content_json_str = None
@@ -932,14 +1044,14 @@ You answer in the same language of the user.
         with col1:
             st.download_button(
                 label="📥 Transcript",
-                data=clean_text(st.session_state.transcript),
+                data=clean_text(session.transcript),
                 file_name=f"youtube_transcript_{language}.txt",
                 mime="text/plain",
                 key="download_transcript"
             )
     
         # H5P Package download button
-        template_zip_path = os.path.join(os.path.dirname(__file__), "template.zip")
+        template_zip_path = TEMPLATE_ZIP_PATH
     
         if not os.path.exists(template_zip_path):
             st.error(f"Template file not found at {template_zip_path}")
@@ -948,19 +1060,9 @@ You answer in the same language of the user.
                 if content_json_str and h5p_json_str:
                     try:
                         # Generate and download the H5P package
-                        buffer = io.BytesIO()
-                        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_new:
-                            with zipfile.ZipFile(template_zip_path, 'r') as zip_ref:
-                                for item in zip_ref.infolist():
-                                    if item.filename not in ['content/content.json', 'h5p.json']:
-                                        zip_new.writestr(item, zip_ref.read(item.filename))
-                            zip_new.writestr('content/content.json', content_json_str)
-                            zip_new.writestr('h5p.json', h5p_json_str)
+                        updated_zip_bytes = build_h5p_package(content_json_str, h5p_json_str, template_zip_path)
     
-                        buffer.seek(0)
-                        updated_zip_bytes = buffer.getvalue()
-    
-                        clean_filename = "".join(c for c in st.session_state.results['topic'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+                        clean_filename = "".join(c for c in results['topic'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
                         clean_filename = clean_filename.replace(' ', '_')
     
                         st.download_button(
@@ -974,23 +1076,42 @@ You answer in the same language of the user.
                 else:
                     st.error("H5P package could not be created due to missing content.")
 
+        # Translated packages from the same analysis are only built on request, not on every rerun
+        localized_locales = st.session_state.get('localized_locales', [])
+        if localized_locales and st.button(f"📦 Prepare Translated Packages ({', '.join(code.upper() for code in localized_locales)})"):
+            localized_results = {code: localized for code, localized in session.localized.items() if localized}
+            columns = st.columns(len(localized_results))
+            for column, (code, localized) in zip(columns, localized_results.items()):
+                with column:
+                    try:
+                        st.download_button(
+                            label=f"📥 H5P Package ({code.upper()})",
+                            data=package_results(localized),
+                            file_name=f"{code}_{package_filename(localized['topic'])}",
+                            mime="application/zip",
+                            key=f"download_h5p_{code}"
+                        )
+                    except Exception as e:
+                        st.error(f"Failed to generate {code.upper()} package: {str(e)}")
+
        
         # Add a collapsible section for OpenAI-generated content
         st.markdown("---")
         st.markdown("### OpenAI-Generated Content")
         
-        with st.expander("📄 View Generated Content"):
+        # Pretty-printed copies are only built while the toggle is on
+        if st.toggle("📄 View Generated Content"):
             transformed_content = {}
         
             # Transform the content for display
-            if 'mcq' in st.session_state.results and st.session_state.results['mcq']:
-                transformed_content['MCQ'] = json.dumps(st.session_state.results['mcq'], indent=2)
+            if 'mcq' in results and results['mcq']:
+                transformed_content['MCQ'] = json.dumps(results['mcq'], indent=2)
         
-            if 'glossary' in st.session_state.results and st.session_state.results['glossary']:
-                transformed_content['Glossary'] = json.dumps(st.session_state.results['glossary'], indent=2)
+            if 'glossary' in results and results['glossary']:
+                transformed_content['Glossary'] = json.dumps(results['glossary'], indent=2)
         
-            if 'drag' in st.session_state.results and st.session_state.results['drag']:
-                transformed_content['Drag Words'] = json.dumps(st.session_state.results['drag'], indent=2)
+            if 'drag' in results and results['drag']:
+                transformed_content['Drag Words'] = json.dumps(results['drag'], indent=2)
         
             # Display transformed content in tabs
             if transformed_content:
@@ -999,6 +1120,11 @@ You answer in the same language of the user.
                     with tab:
                         st.text_area(f"{content_type} Content", content, height=300)
 
+        # Per-stage timings of the last generation run
+        if st.session_state.timings:
+            with st.expander("⏱️ Timings"):
+                st.dataframe(st.session_state.timings, use_container_width=True)
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,440 @@
+"""
+Content-addressed storage for generated .h5p packages.
+
+Every package carries the same library files from template.zip and differs
+only in content/content.json and h5p.json. The store keeps each zip member's
+compressed bytes once as a blob named by its SHA-256. The member list of the
+template libraries is stored once as a shared layer, so the manifest of a
+package only lists its two generated members. Full packages are reassembled
+on demand by streaming the stored member data into a new zip without
+recompressing it.
+
+Layout under the store directory:
+
+    blobs/ab/abcdef...     compressed member data
+    layers/<id>.json       shared member lists
+    packages/<id>.json     manifest: metadata, layer id and generated members
+
+Run from the videocol directory to import, list, export or collect garbage:
+
+    python -m artifact_store --root store import unit.h5p
+    python -m artifact_store --root store gc
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zipfile
+import zlib
+
+from resources import GENERATED_ENTRIES, TEMPLATE_ZIP_PATH, template_base
+
+logger = logging.getLogger(__name__)
+
+# If set, generated packages are kept in an artifact store at this directory
+ARTIFACT_STORE_DIR_ENV = "H5P_ARTIFACT_STORE_DIR"
+
+CHUNK_SIZE = 64 * 1024
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_OF_CENTRAL_DIRECTORY = struct.Struct('<IHHHHIIH')
+_UTF8_FLAG = 0x800
+
+
+def _dos_time(date_time) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((max(year, 1980) - 1980) << 9) | (month << 5) | day
+
+
+def _check_id(object_id: str) -> str:
+    """Reject ids that are not hex digests, they end up in file paths."""
+    if not object_id or not all(c in '0123456789abcdef' for c in object_id):
+        raise Exception(f"Invalid id: {object_id}")
+    return object_id
+
+
+def _read_raw_member(fp, info: zipfile.ZipInfo) -> bytes:
+    """Compressed bytes of a member, read straight from the archive."""
+    fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER.size))
+    if header[0] != 0x04034b50:
+        raise Exception(f"Bad local header for {info.filename}")
+    fp.seek(info.header_offset + _LOCAL_HEADER.size + header[9] + header[10])
+    return fp.read(info.compress_size)
+
+
+class ArtifactStore:
+    """Deduplicating package store rooted at `root`; safe to share between threads and processes."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._blob_dir = os.path.join(root, "blobs")
+        self._layer_dir = os.path.join(root, "layers")
+        self._package_dir = os.path.join(root, "packages")
+        for directory in (self._blob_dir, self._layer_dir, self._package_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._layers = {}
+        self._template_layers = {}
+
+    # Blobs
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            # Refresh the timestamp so a concurrent gc treats the blob as recent
+            os.utime(path)
+        else:
+            self._write_atomic(path, data)
+        return digest
+
+    def _entry(self, info: zipfile.ZipInfo, raw: bytes) -> dict:
+        if info.flag_bits & 0x1:
+            raise Exception(f"Encrypted member {info.filename} is not supported")
+        return {
+            'name': info.filename,
+            'blob': self._put_blob(raw),
+            'compress_type': info.compress_type,
+            'crc': info.CRC,
+            'compress_size': info.compress_size,
+            'file_size': info.file_size,
+            'date_time': list(info.date_time),
+            'external_attr': info.external_attr,
+        }
+
+    def _entries_from_zip(self, source) -> list[dict]:
+        """Store the members of a zip (path, bytes or binary file) as blobs."""
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with zipfile.ZipFile(source, 'r') as zip_ref:
+            fp = zip_ref.fp
+            return [self._entry(info, _read_raw_member(fp, info))
+                    for info in zip_ref.infolist()]
+
+    def _generated_entry(self, name: str, text: str) -> dict:
+        data = text.encode('utf-8')
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        raw = compressor.compress(data) + compressor.flush()
+        info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.CRC = zlib.crc32(data)
+        info.compress_size = len(raw)
+        info.file_size = len(data)
+        info.external_attr = 0o600 << 16
+        return self._entry(info, raw)
+
+    # Layers
+
+    def _layer_path(self, layer_id: str) -> str:
+        return os.path.join(self._layer_dir, f"{_check_id(layer_id)}.json")
+
+    def _put_layer(self, entries: list[dict]) -> str:
+        """Store a member list shared by many packages (the template libraries) and return its id."""
+        data = json.dumps(entries, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        layer_id = hashlib.sha256(data).hexdigest()[:32]
+        path = self._layer_path(layer_id)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            self._write_atomic(path, data)
+        return layer_id
+
+    def _load_layer(self, layer_id: str) -> list[dict]:
+        with self._lock:
+            if layer_id in self._layers:
+                return self._layers[layer_id]
+        try:
+            with open(self._layer_path(layer_id), encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            raise Exception(f"Missing layer: {layer_id}")
+        with self._lock:
+            self._layers[layer_id] = entries
+        return entries
+
+    def _template_layer(self, template_zip_path: str) -> str:
+        """Layer of the template libraries, stored once per process and template."""
+        with self._lock:
+            layer_id = self._template_layers.get(template_zip_path)
+        if layer_id is None or not os.path.exists(self._layer_path(layer_id)):
+            layer_id = self._put_layer(self._entries_from_zip(template_base(template_zip_path)))
+            with self._lock:
+                self._template_layers[template_zip_path] = layer_id
+        else:
+            os.utime(self._layer_path(layer_id))
+        return layer_id
+
+    # Packages
+
+    def _manifest_path(self, package_id: str) -> str:
+        return os.path.join(self._package_dir, f"{_check_id(package_id)}.json")
+
+    def _put_manifest(self, layer_id: str, entries: list[dict], file_name: str = None) -> str:
+        package_id = hashlib.sha256(
+            json.dumps([layer_id, [(e['name'], e['blob']) for e in entries]]).encode('utf-8')).hexdigest()[:32]
+        path = self._manifest_path(package_id)
+        if os.path.exists(path):
+            os.utime(path)
+            return package_id
+
+        h5p_json = {}
+        h5p_entry = next((e for e in entries if e['name'] == 'h5p.json'), None)
+        if h5p_entry:
+            try:
+                h5p_json = json.loads(self._read_member(h5p_entry))
+            except (json.JSONDecodeError, UnicodeDecodeError, zlib.error) as e:
+                logger.warning(f"Unreadable h5p.json in package {package_id}: {e}")
+
+        manifest = {
+            'id': package_id,
+            'title': h5p_json.get('title', ''),
+            'language': h5p_json.get('language', ''),
+            'file_name': file_name,
+            'created': time.time(),
+            'size': self._archive_size(self._load_layer(layer_id) + entries),
+            'layer': layer_id,
+            'entries': entries,
+        }
+        self._write_atomic(path, json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+        logger.info(f"Stored package {package_id} ({manifest['title']})")
+        return package_id
+
+    def put_package(self, source, file_name: str = None) -> str:
+        """Store an existing .h5p package (path, bytes or binary file) and return its id."""
+        try:
+            entries = self._entries_from_zip(source)
+        except (zipfile.BadZipFile, OSError) as e:
+            logger.error(f"Error storing H5P package: {e}")
+            raise Exception(f"Failed to store H5P package: {str(e)}")
+        libraries = [e for e in entries if e['name'] not in GENERATED_ENTRIES]
+        generated = [e for e in entries if e['name'] in GENERATED_ENTRIES]
+        return self._put_manifest(self._put_layer(libraries), generated, file_name)
+
+    def put_generated(self, content_json_str: str, h5p_json_str: str, file_name: str = None,
+                      template_zip_path: str = TEMPLATE_ZIP_PATH) -> str:
+        """
+        Store a package built from the template and the two generated JSON files,
+        without assembling the zip first. Returns the package id.
+        """
+        entries = [
+            self._generated_entry(GENERATED_ENTRIES[0], content_json_str),
+            self._generated_entry(GENERATED_ENTRIES[1], h5p_json_str),
+        ]
+        return self._put_manifest(self._template_layer(template_zip_path), entries, file_name)
+
+    def get_manifest(self, package_id: str) -> dict:
+        try:
+            with open(self._manifest_path(package_id), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise Exception(f"Unknown package: {package_id}")
+
+    def _package_entries(self, package_id: str) -> list[dict]:
+        manifest = self.get_manifest(package_id)
+        return self._load_layer(manifest['layer']) + manifest['entries']
+
+    def list_packages(self) -> list[dict]:
+        """Metadata of all stored packages, newest first."""
+        packages = []
+        for name in os.listdir(self._package_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                manifest = self.get_manifest(name[:-5])
+            except Exception as e:
+                logger.warning(f"Skipping unreadable manifest {name}: {e}")
+                continue
+            manifest.pop('entries')
+            packages.append(manifest)
+        return sorted(packages, key=lambda manifest: manifest['created'], reverse=True)
+
+    def delete(self, package_id: str):
+        """Remove a package; its blobs are freed by the next gc()."""
+        try:
+            os.remove(self._manifest_path(package_id))
+        except FileNotFoundError:
+            raise Exception(f"Unknown package: {package_id}")
+
+    def _read_member(self, entry: dict) -> bytes:
+        with open(self._blob_path(entry['blob']), 'rb') as f:
+            raw = f.read()
+        if entry['compress_type'] == zipfile.ZIP_STORED:
+            return raw
+        return zlib.decompress(raw, -15)
+
+    def read_json(self, package_id: str) -> tuple[dict, dict]:
+        """content.json and h5p.json of a stored package, e.g. for h5p_import.parse_content_json."""
+        entries = {e['name']: e for e in self.get_manifest(package_id)['entries']}
+        return tuple(json.loads(self._read_member(entries[name]).decode('utf-8')) for name in GENERATED_ENTRIES)
+
+    # Reassembly
+
+    @staticmethod
+    def _archive_size(entries: list[dict]) -> int:
+        names = sum(len(e['name'].encode('utf-8')) for e in entries)
+        return (sum(e['compress_size'] for e in entries) + 2 * names
+                + len(entries) * (_LOCAL_HEADER.size + _CENTRAL_HEADER.size) + _END_OF_CENTRAL_DIRECTORY.size)
+
+    def iter_package(self, package_id: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Yield the bytes of a stored package as a valid .h5p zip.
+
+        Member data is copied from the blobs unchanged, so memory use is bounded
+        by `chunk_size` regardless of the package size.
+        """
+        entries = self._package_entries(package_id)
+        offset = 0
+        central = []
+        for entry in entries:
+            name = entry['name'].encode('utf-8')
+            flags = 0 if entry['name'].isascii() else _UTF8_FLAG
+            dos_time, dos_date = _dos_time(entry['date_time'])
+            header = _LOCAL_HEADER.pack(0x04034b50, 20, flags, entry['compress_type'], dos_time, dos_date,
+                                        entry['crc'], entry['compress_size'], entry['file_size'], len(name), 0)
+            yield header + name
+            with open(self._blob_path(entry['blob']), 'rb') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            central.append(_CENTRAL_HEADER.pack(
+                0x02014b50, 20, 20, flags, entry['compress_type'], dos_time, dos_date, entry['crc'],
+                entry['compress_size'], entry['file_size'], len(name), 0, 0, 0, 0,
+                entry['external_attr'], offset) + name)
+            offset += len(header) + len(name) + entry['compress_size']
+
+        directory = b''.join(central)
+        yield directory + _END_OF_CENTRAL_DIRECTORY.pack(
+            0x06054b50, 0, 0, len(entries), len(entries), len(directory), offset, 0)
+
+    def get_package(self, package_id: str) -> bytes:
+        """The complete .h5p package as bytes."""
+        return b''.join(self.iter_package(package_id))
+
+    # Garbage collection
+
+    def _collect(self, directory: str, referenced: set, cutoff: float, suffix: str = '') -> tuple[int, int]:
+        removed, freed = 0, 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not name.endswith(suffix) or os.path.isdir(path):
+                continue
+            stat = os.stat(path)
+            if name[:len(name) - len(suffix)] not in referenced and stat.st_mtime < cutoff:
+                os.remove(path)
+                removed += 1
+                freed += stat.st_size
+        return removed, freed
+
+    def gc(self, grace_seconds: float = 3600) -> dict:
+        """
+        Delete layers and blobs no package refers to.
+
+        Files younger than `grace_seconds` are kept, so a package being stored
+        concurrently (blobs written, manifest not yet) is not broken.
+        """
+        layers, blobs = set(), set()
+        for name in os.listdir(self._package_dir):
+            if name.endswith('.json'):
+                try:
+                    manifest = self.get_manifest(name[:-5])
+                    layers.add(manifest['layer'])
+                    blobs.update(e['blob'] for e in manifest['entries'])
+                except Exception as e:
+                    # An unreadable manifest may still reference blobs, don't collect anything
+                    logger.error(f"Aborting gc, unreadable manifest {name}: {e}")
+                    raise Exception(f"Cannot collect garbage, unreadable manifest {name}")
+
+        cutoff = time.time() - grace_seconds
+        removed_layers, _ = self._collect(self._layer_dir, layers, cutoff, '.json')
+        # Layers kept because they are recent still pin their blobs
+        for name in os.listdir(self._layer_dir):
+            if name.endswith('.json'):
+                blobs.update(e['blob'] for e in self._load_layer(name[:-5]))
+
+        removed, freed = 0, 0
+        for prefix in os.listdir(self._blob_dir):
+            prefix_removed, prefix_freed = self._collect(os.path.join(self._blob_dir, prefix), blobs, cutoff)
+            removed += prefix_removed
+            freed += prefix_freed
+        with self._lock:
+            self._layers.clear()
+            self._template_layers.clear()
+        logger.info(f"Artifact gc removed {removed_layers} layers and {removed} blobs ({freed} bytes)")
+        return {'packages': len(os.listdir(self._package_dir)), 'referenced_blobs': len(blobs),
+                'removed_layers': removed_layers, 'removed_blobs': removed, 'freed_bytes': freed}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore | None:
+    """Process-wide store at $H5P_ARTIFACT_STORE_DIR, or None if not configured."""
+    root = os.environ.get(ARTIFACT_STORE_DIR_ENV)
+    if not root:
+        return None
+    with _stores_lock:
+        if root not in _stores:
+            logger.info(f"Using artifact store at {root}")
+            _stores[root] = ArtifactStore(root)
+        return _stores[root]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the content-addressed H5P package store")
+    parser.add_argument("--root", default=os.environ.get(ARTIFACT_STORE_DIR_ENV), help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Store .h5p files")
+    import_parser.add_argument("files", nargs="+")
+    commands.add_parser("list", help="List stored packages")
+    export_parser = commands.add_parser("export", help="Reassemble a package")
+    export_parser.add_argument("package_id")
+    export_parser.add_argument("output")
+    delete_parser = commands.add_parser("delete", help="Remove a package")
+    delete_parser.add_argument("package_id")
+    gc_parser = commands.add_parser("gc", help="Delete unreferenced blobs")
+    gc_parser.add_argument("--grace-seconds", type=float, default=3600)
+    args = parser.parse_args(argv)
+
+    if not args.root:
+        parser.error(f"--root or ${ARTIFACT_STORE_DIR_ENV} is required")
+    logging.basicConfig(level=logging.INFO)
+    store = ArtifactStore(args.root)
+
+    if args.command == "import":
+        for path in args.files:
+            print(store.put_package(path, file_name=os.path.basename(path)), path)
+    elif args.command == "list":
+        for package in store.list_packages():
+            print(package['id'], package['language'], package['size'], package['title'])
+    elif args.command == "export":
+        with open(args.output, 'wb') as f:
+            for chunk in store.iter_package(args.package_id):
+                f.write(chunk)
+    elif args.command == "delete":
+        store.delete(args.package_id)
+    elif args.command == "gc":
+        print(json.dumps(store.gc(args.grace_seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+End-to-end pipeline benchmarks against local stand-ins for YouTube and OpenAI.
+
+Run from the videocol directory:
+
+    python -m benchmarks.bench_pipeline --output bench.json
+
+The JSON output carries the git commit, so results of two commits can be
+compared directly.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from clients import set_transcript_api
+from benchmarks.fakes import CANNED_RESPONSES, FakeOpenAI, FakeTranscriptApi
+from playlist import StubPlaylistBackend, expand_videos
+from transcripts import prefetch_transcripts
+
+logger = logging.getLogger(__name__)
+
+
+def _timeit(func, repeat: int) -> dict:
+    """Run func `repeat` times and summarize the wall-clock durations in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        'repeat': repeat,
+        'mean_ms': statistics.mean(durations),
+        'median_ms': statistics.median(durations),
+        'min_ms': min(durations),
+        'max_ms': max(durations),
+    }
+
+
+def bench_transforms(repeat: int) -> dict:
+    return {
+        'transform_mcq': _timeit(lambda: app.transform_mcq(CANNED_RESPONSES['mcq']), repeat),
+        'transform_drag': _timeit(lambda: app.transform_drag(CANNED_RESPONSES['drag']), repeat),
+        'transform_glossary': _timeit(lambda: app.transform_glossary(CANNED_RESPONSES['glossary']), repeat),
+    }
+
+
+def _sample_results() -> dict:
+    return {
+        'mcq': app.transform_mcq(CANNED_RESPONSES['mcq']),
+        'glossary': app.transform_glossary(CANNED_RESPONSES['glossary']),
+        'drag': app.transform_drag(CANNED_RESPONSES['drag']),
+        'welcome': "<p>Willkommen!</p>",
+        'topic': "Benchmark",
+        'url': "https://www.youtube.com/watch?v=benchmark01",
+    }
+
+
+def bench_packaging(repeat: int) -> dict:
+    results = _sample_results()
+
+    def content_json():
+        return app.create_content_json(
+            video_url=results['url'],
+            mcq_content=results['mcq'],
+            glossary_content=results['glossary'],
+            drag_content=results['drag'],
+            welcome_text=results['welcome']
+        )
+
+    content_json_str = content_json()
+    h5p_json_str = app.create_h5p_json(results['topic'])
+    package = app.build_h5p_package(content_json_str, h5p_json_str)
+
+    return {
+        'create_content_json': _timeit(content_json, repeat),
+        'create_h5p_json': _timeit(lambda: app.create_h5p_json(results['topic']), repeat),
+        'build_h5p_package': _timeit(lambda: app.build_h5p_package(content_json_str, h5p_json_str), repeat),
+        'package_bytes': len(package),
+    }
+
+
+def run_pipeline(client, index: int, language: str, run: int = 0) -> bytes:
+    """One full unit: transcript, all generators, JSON and zip assembly."""
+    # Unique video IDs per run, so no run is served from the transcript store
+    url = f"https://www.youtube.com/watch?v=r{run:04d}{index:06d}"
+    transcript = app.extract_transcript(url, language)
+    results = app.generate_results(client, transcript, url,
+                                   generate_mcq=True, generate_glossary=True, generate_drag=True)
+    content_json_str = app.create_content_json(
+        video_url=results['url'],
+        mcq_content=results['mcq'],
+        glossary_content=results['glossary'],
+        drag_content=results['drag'],
+        welcome_text=results['welcome']
+    )
+    return app.build_h5p_package(content_json_str, app.create_h5p_json(results['topic']))
+
+
+def bench_pipeline(concurrency_levels: list[int], word_counts: list[int], llm_latency: float,
+                   transcript_latency: float, language: str) -> list[dict]:
+    runs = []
+    for word_count in word_counts:
+        for concurrency in concurrency_levels:
+            FakeTranscriptApi.configure(latency=transcript_latency, word_count=word_count)
+            client = FakeOpenAI(latency=llm_latency)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                packages = list(executor.map(lambda i: run_pipeline(client, i, language, len(runs)),
+                                             range(concurrency)))
+            wall_clock = time.perf_counter() - start
+
+            runs.append({
+                'word_count': word_count,
+                'concurrency': concurrency,
+                'wall_clock_s': wall_clock,
+                'units_per_s': concurrency / wall_clock,
+                'llm_calls': client.calls,
+                'transcript_list_calls': FakeTranscriptApi.calls,
+                'package_bytes': len(packages[0]),
+            })
+            logger.info(f"pipeline words={word_count} concurrency={concurrency}: {wall_clock:.3f}s")
+    return runs
+
+
+def bench_playlist(video_count: int, workers_levels: list[int], transcript_latency: float, language: str) -> list[dict]:
+    """Expand a stub playlist and prefetch all of its transcripts, as the Playlist / Channel section does."""
+    runs = []
+    for workers in workers_levels:
+        playlist_id = f"PLbench{workers}"
+        # Fresh video IDs per run, so nothing comes from the transcript store
+        backend = StubPlaylistBackend({playlist_id: [f"p{workers:04d}{i:06d}" for i in range(video_count)]})
+        FakeTranscriptApi.configure(latency=transcript_latency, word_count=1000)
+
+        start = time.perf_counter()
+        video_ids = expand_videos(f"https://www.youtube.com/playlist?list={playlist_id}", backend, limit=video_count)
+        errors = prefetch_transcripts(video_ids, language, max_workers=workers)
+        wall_clock = time.perf_counter() - start
+
+        runs.append({
+            'videos': len(video_ids),
+            'workers': workers,
+            'wall_clock_s': wall_clock,
+            'failed': sum(1 for error in errors.values() if error),
+            'transcript_list_calls': FakeTranscriptApi.calls,
+        })
+        logger.info(f"playlist videos={len(video_ids)} workers={workers}: {wall_clock:.3f}s")
+    return runs
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the H5P generation pipeline with mocked backends")
+    parser.add_argument('--repeat', type=int, default=50, help="iterations for the micro benchmarks")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 10000], help="transcript lengths in words")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="simulated seconds per LLM call")
+    parser.add_argument('--transcript-latency', type=float, default=0.02, help="simulated seconds per YouTube call")
+    parser.add_argument('--language', default="de")
+    parser.add_argument('--playlist-videos', type=int, default=32, help="videos in the stub playlist")
+    parser.add_argument('--prefetch-workers', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Streamlit complains about the missing script run context outside `streamlit run`
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    set_transcript_api(FakeTranscriptApi)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'transforms': bench_transforms(args.repeat),
+        'packaging': bench_packaging(max(1, args.repeat // 10)),
+        'pipeline': bench_pipeline(args.concurrency, args.words, args.llm_latency,
+                                   args.transcript_latency, args.language),
+        'playlist': bench_playlist(args.playlist_videos, args.prefetch_workers, args.transcript_latency, args.language),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
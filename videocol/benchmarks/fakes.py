@@ -0,0 +1,203 @@
+"""
+Local stand-ins for YouTubeTranscriptApi and the OpenAI client.
+
+Both mimic the parts of the real APIs that app.py uses, sleep for a
+configurable latency to simulate network time and return canned responses.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+WORDS = (
+    "Photosynthese ist der Prozess, bei dem Pflanzen Sonnenlicht in Energie umwandeln. "
+    "Die Mitochondrien liefern der Zelle Energie in Form von ATP. "
+    "Ein Ökosystem beschreibt das Zusammenspiel von Lebewesen und ihrer Umwelt. "
+).split()
+
+
+def make_transcript(word_count: int) -> list[dict]:
+    """Transcript entries in the format returned by Transcript.fetch()."""
+    entries = []
+    words = [WORDS[i % len(WORDS)] for i in range(word_count)]
+    for i in range(0, word_count, 12):
+        entries.append({'text': " ".join(words[i:i + 12]), 'start': i * 0.4, 'duration': 4.8})
+    return entries
+
+
+class FakeTranscript:
+    """Mimics youtube_transcript_api.Transcript."""
+
+    def __init__(self, video_id: str, language_code: str, is_generated: bool, word_count: int, latency: float,
+                 translation_languages: list[str] = None):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.language = language_code
+        self.is_generated = is_generated
+        self.translation_languages = [
+            {'language': code, 'language_code': code} for code in (translation_languages or [])
+        ]
+        self.is_translatable = bool(self.translation_languages)
+        self._word_count = word_count
+        self._latency = latency
+
+    def fetch(self) -> list[dict]:
+        time.sleep(self._latency)
+        return make_transcript(self._word_count)
+
+    def translate(self, language_code: str) -> "FakeTranscript":
+        if language_code not in [t['language_code'] for t in self.translation_languages]:
+            raise Exception(f"Translation to {language_code} not available")
+        return FakeTranscript(self.video_id, language_code, True, self._word_count, self._latency)
+
+
+class FakeTranscriptList:
+    """Mimics youtube_transcript_api.TranscriptList."""
+
+    def __init__(self, video_id: str, transcripts: list[FakeTranscript]):
+        self.video_id = video_id
+        self._transcripts = transcripts
+
+    def __iter__(self):
+        return iter(self._transcripts)
+
+    def _find(self, language_codes, generated: bool = None):
+        for code in language_codes:
+            for transcript in self._transcripts:
+                if transcript.language_code == code and generated in (None, transcript.is_generated):
+                    return transcript
+        raise Exception(f"No transcript found for {language_codes}")
+
+    def find_transcript(self, language_codes):
+        # Like the real API, manually created transcripts win over generated ones
+        try:
+            return self._find(language_codes, generated=False)
+        except Exception:
+            return self._find(language_codes, generated=True)
+
+    def find_manually_created_transcript(self, language_codes):
+        return self._find(language_codes, generated=False)
+
+    def find_generated_transcript(self, language_codes):
+        return self._find(language_codes, generated=True)
+
+
+class FakeTranscriptApi:
+    """
+    Drop-in for the YouTubeTranscriptApi class. Every video has a manual
+    German transcript and a generated English one, both translatable.
+    """
+    latency = 0.0
+    word_count = 2000
+    calls = 0
+
+    @classmethod
+    def configure(cls, latency: float = 0.0, word_count: int = 2000):
+        cls.latency = latency
+        cls.word_count = word_count
+        cls.calls = 0
+
+    @classmethod
+    def list_transcripts(cls, video_id: str) -> FakeTranscriptList:
+        cls.calls += 1
+        time.sleep(cls.latency)
+        languages = ["de", "en", "fr", "it", "es"]
+        return FakeTranscriptList(video_id, [
+            FakeTranscript(video_id, "de", False, cls.word_count, cls.latency, languages),
+            FakeTranscript(video_id, "en", True, cls.word_count, cls.latency, languages),
+        ])
+
+
+QUESTIONS = [
+    ("Was wandeln Pflanzen bei der Photosynthese um?", "Sonnenlicht in chemische Energie"),
+    ("Welche Organellen gelten als Kraftwerke der Zelle?", "Mitochondrien"),
+    ("Welcher Stoff dient als Energieträger der Zelle?", "ATP"),
+    ("Was beschreibt ein Ökosystem?", "Lebewesen und ihre Umwelt"),
+    ("Warum sind Pflanzen für Nahrungsketten zentral?", "Sie produzieren Biomasse"),
+    ("Wieso benötigen Muskelzellen viele Mitochondrien?", "Hoher Energiebedarf"),
+    ("Welche Folge hätte fehlendes Licht für Pflanzen?", "Keine Zuckerproduktion"),
+    ("Wie hängen Atmung und Photosynthese zusammen?", "Sie bilden einen Stoffkreislauf"),
+]
+
+
+def _question(i: int) -> dict:
+    question_text, correct = QUESTIONS[i]
+    return {
+        "bloom_level": "Erinnern" if i < 4 else "Verstehen",
+        "question_text": question_text,
+        "answers": [
+            {"text": correct, "is_correct": True, "feedback": f"✅ Richtig, **{correct}**."},
+            {"text": "Wasser in Salz", "is_correct": False, "feedback": f"❌ Falsch, richtig ist **{correct}**."},
+            {"text": "Keine der Antworten", "is_correct": False, "feedback": f"❌ Falsch, richtig ist **{correct}**."},
+        ]
+    }
+
+
+CANNED_RESPONSES = {
+    'welcome': json.dumps({
+        "topic": "Zellbiologie Grundlagen",
+        "welcome_html": "<p>Willkommen!</p><h3>❗ Wieso ist es wichtig?</h3><ul><li>A</li><li>B</li><li>C</li></ul>"
+    }, ensure_ascii=False),
+    'mcq': json.dumps({"questions_list": [_question(i) for i in range(len(QUESTIONS))]}, ensure_ascii=False),
+    'glossary': json.dumps({"glossary": {"output_template": [
+        "*Photosynthese:Energie aus Licht*: Umwandlung von Sonnenlicht in chemische Energie.",
+        "*Mitochondrien:Kraftwerk der Zelle*: Organellen, die ATP herstellen.",
+        "*Ökosystem:Lebewesen und Umwelt*: Gemeinschaft von Organismen und ihrem Lebensraum.",
+    ]}}, ensure_ascii=False),
+    'drag': json.dumps({"drag_the_words": {"output_template": [
+        "Pflanzen nutzen *Photosynthese:Wie heisst der Prozess?*, um *Sonnenlicht:Welche Energiequelle?* umzuwandeln.",
+        "Die *Mitochondrien:Welche Organellen?* liefern *ATP:Welcher Energieträger?*.",
+    ]}}, ensure_ascii=False),
+}
+
+
+def classify_prompt(prompt: str) -> str:
+    """Which generator a prompt belongs to, based on the JSON keys it asks for."""
+    if '{"translations"' in prompt:
+        return 'translate'
+    if "welcome_html" in prompt:
+        return 'welcome'
+    if "questions_list" in prompt:
+        return 'mcq'
+    if "drag_the_words" in prompt:
+        return 'drag'
+    if "glossary" in prompt:
+        return 'glossary'
+    return 'unknown'
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, messages: list, **kwargs):
+        owner = self._owner
+        time.sleep(owner.latency)
+        prompt = "\n".join(message['content'] for message in messages)
+        kind = classify_prompt(prompt)
+        if kind == 'translate':
+            # Echo the input strings back with a marker, one per input
+            texts = json.loads(prompt[prompt.rindex("Input:\n") + len("Input:\n"):])
+            content = json.dumps({"translations": [f"[{model}] {text}" for text in texts]}, ensure_ascii=False)
+        else:
+            content = owner.responses.get(kind, "{}")
+        owner.calls += 1
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            # Rough token estimate, about 4 characters per token
+            usage=SimpleNamespace(
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=len(content) // 4,
+                total_tokens=(len(prompt) + len(content)) // 4
+            )
+        )
+
+
+class FakeOpenAI:
+    """Drop-in for openai.OpenAI with canned responses and simulated latency."""
+
+    def __init__(self, api_key: str = "fake", latency: float = 0.0, responses: dict = None):
+        self.latency = latency
+        self.responses = responses or CANNED_RESPONSES
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
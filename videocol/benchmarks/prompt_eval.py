@@ -0,0 +1,284 @@
+"""
+Offline A/B evaluation of prompt versions.
+
+Prompt variants are versions from the registry (resources/prompts/<name>.<version>.txt),
+given as `name=version` overrides of the manifest, e.g. `mcq=v2` or
+`mcq=v2,drag=v2`; `default` is the manifest itself. Only v1 prompts ship, so
+a candidate is added as a new file first, e.g. resources/prompts/mcq.v2.txt.
+Every variant runs app.generate_results, including the question top-up,
+against each transcript of a corpus and reports token counts, latency,
+parse success rate, item counts and top-up calls.
+
+Run from the videocol directory. Record a corpus once with the real API:
+
+    python -m benchmarks.prompt_eval record --corpus corpus --videos VIDEO_ID ... --variants default mcq=v2
+
+then replay it offline as often as needed, or run against the mock model or
+the local backend (see llm_backends):
+
+    python -m benchmarks.prompt_eval replay --corpus corpus --variants default mcq=v2 --output eval.json
+    python -m benchmarks.prompt_eval mock --variants default
+    python -m benchmarks.prompt_eval local --variants default
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from benchmarks.bench_pipeline import _git_commit
+from benchmarks.fakes import FakeOpenAI, make_transcript
+from clients import get_openai_client
+from llm_backends import Completion, LLMBackend, LocalBackend, OpenAIBackend, RecordedBackend, response_key
+from locales import DEFAULT_LOCALE
+from metrics import metrics
+from resources import available_prompt_versions, locale_catalog, prompt_id, prompt_versions
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('welcome', 'mcq', 'glossary', 'drag')
+
+
+class Corpus:
+    """
+    Recorded transcripts and model responses.
+
+    Layout: transcripts/<video_id>.<language>.json holds one transcript,
+    responses.json maps response_key() to the recorded completion.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.items = []
+        self.responses = {}
+        self._lock = threading.Lock()
+
+        transcript_dir = os.path.join(path, "transcripts")
+        if os.path.isdir(transcript_dir):
+            for file_name in sorted(os.listdir(transcript_dir)):
+                if file_name.endswith(".json"):
+                    with open(os.path.join(transcript_dir, file_name), encoding='utf-8') as f:
+                        self.items.append(json.load(f))
+        responses_path = os.path.join(path, "responses.json")
+        if os.path.exists(responses_path):
+            with open(responses_path, encoding='utf-8') as f:
+                self.responses = json.load(f)
+
+    def add_transcript(self, video_id: str, language: str, transcript: str):
+        item = {'video_id': video_id, 'language': language, 'transcript': transcript}
+        self.items = [i for i in self.items if (i['video_id'], i['language']) != (video_id, language)] + [item]
+
+    def record(self, key: str, record: dict):
+        with self._lock:
+            self.responses[key] = record
+
+    def save(self):
+        transcript_dir = os.path.join(self.path, "transcripts")
+        os.makedirs(transcript_dir, exist_ok=True)
+        for item in self.items:
+            with open(os.path.join(transcript_dir, f"{item['video_id']}.{item['language']}.json"), 'w',
+                      encoding='utf-8') as f:
+                json.dump(item, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            tmp_path = os.path.join(self.path, "responses.json.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.responses, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(self.path, "responses.json"))
+
+
+class RecordingBackend(LLMBackend):
+    """Wraps a backend and records every completion into the corpus."""
+
+    def __init__(self, backend: LLMBackend, corpus: Corpus):
+        self.backend = backend
+        self.corpus = corpus
+        self.name = backend.name
+
+    def complete(self, messages: list[dict], model: str, kind: str = "analysis", **options) -> Completion:
+        start = time.perf_counter()
+        completion = self.backend.complete(messages, model, kind, **options)
+        self.corpus.record(response_key(model, messages), {
+            'content': completion.content,
+            'prompt_tokens': completion.prompt_tokens,
+            'completion_tokens': completion.completion_tokens,
+            'latency': time.perf_counter() - start,
+        })
+        return completion
+
+    def model_id(self, model: str) -> str:
+        return self.backend.model_id(model)
+
+
+def parse_variant(spec: str) -> dict:
+    """'mcq=v2,drag=v2' -> {'mcq': 'v2', 'drag': 'v2'}; 'default' -> {}."""
+    if spec == 'default':
+        return {}
+    overrides = {}
+    for part in spec.split(','):
+        name, _, version = part.partition('=')
+        if name not in KINDS or not version:
+            raise Exception(f"Invalid variant {spec!r}, expected e.g. mcq=v2")
+        if version not in available_prompt_versions(name):
+            raise Exception(f"Unknown prompt version {name}:{version}, "
+                            f"available: {', '.join(available_prompt_versions(name))}")
+        overrides[name] = version
+    return overrides
+
+
+def evaluate(client, transcript: str, kind: str, versions: dict, model: str) -> dict:
+    """
+    Run generate_results for one content type with the prompt `versions`, as
+    production does including the question top-up, and measure it.
+    """
+    url = "https://www.youtube.com/watch?v=evaluation1"
+    # A previous welcome for the same video skips the welcome call when another kind is evaluated
+    previous = None if kind == 'welcome' else {'url': url, 'welcome': "-", 'topic': "-"}
+    outcome = {'parsed': False, 'items': 0, 'error': None}
+    with metrics.collect() as events:
+        try:
+            results = app.generate_results(client, transcript, url,
+                                           generate_mcq=kind == 'mcq',
+                                           generate_glossary=kind == 'glossary',
+                                           generate_drag=kind == 'drag',
+                                           previous=previous, model=model, prompts=versions)
+            if kind == 'welcome':
+                if results['topic'] == locale_catalog(DEFAULT_LOCALE)['column']['fallbackTopic']:
+                    raise Exception("No welcome message")
+                outcome['items'] = 1
+            elif kind == 'mcq':
+                outcome['items'] = len(results['mcq'])
+            else:
+                outcome['items'] = len([line for line in results[kind]['textField'].split("\n") if line.strip()])
+            outcome['parsed'] = True
+        except Exception as e:
+            outcome['error'] = str(e)
+
+    calls = [event for event in events if event['stage'] == 'llm_call']
+    tokens = [event for event in events if event['stage'] == 'llm_tokens']
+    outcome.update(
+        top_ups=sum(1 for event in calls if event['kind'] == 'mcq_top_up'),
+        latency_s=sum(event['seconds'] for event in calls),
+        prompt_tokens=sum(event['prompt_tokens'] for event in tokens),
+        completion_tokens=sum(event['completion_tokens'] for event in tokens),
+    )
+    return outcome
+
+
+def _summarize(variant: str, kind: str, version: str, outcomes: list[dict]) -> dict:
+    parsed = [outcome for outcome in outcomes if outcome['parsed']]
+    latencies = sorted(outcome['latency_s'] for outcome in outcomes)
+    return {
+        'variant': variant,
+        'kind': kind,
+        'prompt': prompt_id(kind, version),
+        'runs': len(outcomes),
+        'parse_success_rate': len(parsed) / len(outcomes),
+        'errors': sorted({outcome['error'] for outcome in outcomes if outcome['error']}),
+        'prompt_tokens_mean': statistics.mean(outcome['prompt_tokens'] for outcome in outcomes),
+        'completion_tokens_mean': statistics.mean(outcome['completion_tokens'] for outcome in outcomes),
+        'latency_mean_s': statistics.mean(latencies),
+        'latency_max_s': latencies[-1],
+        'items_mean': statistics.mean(outcome['items'] for outcome in parsed) if parsed else 0,
+        'top_ups_mean': statistics.mean(outcome['top_ups'] for outcome in outcomes),
+    }
+
+
+def run_evaluation(client, items: list[dict], variants: list[str], kinds=KINDS, model: str = "gpt-4o-mini",
+                   workers: int = 8) -> list[dict]:
+    """Evaluate every variant on every corpus item in parallel; one summary row per variant and kind."""
+    tasks = []
+    for variant in variants:
+        versions = {**prompt_versions(), **parse_variant(variant)}
+        for kind in kinds:
+            for item in items:
+                tasks.append((variant, kind, versions, item))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(
+            lambda task: evaluate(client, task[3]['transcript'], task[1], task[2], model), tasks))
+
+    grouped = {}
+    for (variant, kind, versions, _), outcome in zip(tasks, outcomes):
+        version = versions[kind]
+        grouped.setdefault((variant, kind, version), []).append(outcome)
+    return [_summarize(variant, kind, version, group) for (variant, kind, version), group in grouped.items()]
+
+
+def _print_table(rows: list[dict]):
+    print(f"{'variant':<20} {'prompt':<14} {'parsed':>7} {'in tok':>8} {'out tok':>8} {'latency':>8} {'items':>6} {'top-up':>6}")
+    for row in rows:
+        print(f"{row['variant']:<20} {row['prompt']:<14} {row['parse_success_rate']:>7.0%} "
+              f"{row['prompt_tokens_mean']:>8.0f} {row['completion_tokens_mean']:>8.0f} "
+              f"{row['latency_mean_s']:>7.2f}s {row['items_mean']:>6.1f} {row['top_ups_mean']:>6.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare prompt versions on recorded transcripts")
+    parser.add_argument('mode', choices=['record', 'replay', 'mock', 'local'],
+                        help="record with the real API, replay recorded responses, "
+                             "or use the mock model or the local backend")
+    parser.add_argument('--corpus', help="corpus directory (required for record and replay)")
+    parser.add_argument('--videos', nargs='*', default=[], help="videos to add to the corpus when recording")
+    parser.add_argument('--language', default="de", help="transcript language of added videos")
+    parser.add_argument('--variants', nargs='+', default=['default'], help="e.g. default mcq=v2 mcq=v2,drag=v2")
+    parser.add_argument('--kinds', nargs='+', default=list(KINDS), choices=KINDS)
+    parser.add_argument('--model', default="gpt-4o-mini")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="replayed latency factor, 0 for none")
+    parser.add_argument('--mock-latency', type=float, default=0.05, help="simulated seconds per mock LLM call")
+    parser.add_argument('--output', help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Streamlit complains about the missing script run context outside `streamlit run`
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    for variant in args.variants:
+        parse_variant(variant)
+    if args.mode in ('record', 'replay') and not args.corpus:
+        parser.error("--corpus is required for record and replay")
+
+    corpus = Corpus(args.corpus) if args.corpus else None
+    if args.mode == 'record':
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            parser.error("OPENAI_API_KEY is required for recording")
+        for video in args.videos:
+            url = video if '/' in video else f"https://www.youtube.com/watch?v={video}"
+            transcript = app.extract_transcript(url, args.language)
+            if not transcript:
+                raise Exception(f"No transcript for {video}")
+            corpus.add_transcript(app.extract_video_id(url), args.language, transcript)
+        client = RecordingBackend(OpenAIBackend(get_openai_client(api_key)), corpus)
+    elif args.mode == 'replay':
+        client = RecordedBackend(corpus.responses, args.latency_scale)
+    elif args.mode == 'local':
+        client = LocalBackend()
+    else:
+        client = FakeOpenAI(latency=args.mock_latency)
+
+    items = corpus.items if corpus and corpus.items else []
+    if not items:
+        if args.mode in ('record', 'replay'):
+            parser.error(f"Corpus {args.corpus} has no transcripts, record some with --videos")
+        items = [{'video_id': 'mock', 'language': args.language,
+                  'transcript': " ".join(entry['text'] for entry in make_transcript(2000))}]
+
+    rows = run_evaluation(client, items, args.variants, args.kinds, args.model, args.workers)
+    if args.mode == 'record':
+        corpus.save()
+
+    _print_table(rows)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': _git_commit(), 'mode': args.mode, 'model': args.model,
+                       'corpus_items': len(items), 'results': rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Lazily imported API clients.
+
+openai and youtube_transcript_api are only imported on the first generation,
+so reruns that just render the page do not pay for them.
+"""
+import threading
+from functools import lru_cache
+
+_lock = threading.Lock()
+_transcript_api = None
+
+
+def get_transcript_api():
+    """The YouTubeTranscriptApi class, imported on first use."""
+    global _transcript_api
+    with _lock:
+        if _transcript_api is None:
+            from youtube_transcript_api import YouTubeTranscriptApi
+            _transcript_api = YouTubeTranscriptApi
+        return _transcript_api
+
+
+def set_transcript_api(api):
+    """Replace the transcript API, e.g. with a local stand-in for benchmarks."""
+    global _transcript_api
+    with _lock:
+        _transcript_api = api
+
+
+@lru_cache(maxsize=32)
+def get_openai_client(api_key: str):
+    """OpenAI client for `api_key`, created once and reused across reruns."""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
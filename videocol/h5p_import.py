@@ -0,0 +1,96 @@
+import json
+import logging
+import zipfile
+
+from locales import DEFAULT_LOCALE, known_titles
+
+logger = logging.getLogger(__name__)
+
+# Only these two entries carry unit-specific data; everything else in a
+# package is the shared library payload copied from template.zip.
+CONTENT_JSON_ENTRY = 'content/content.json'
+H5P_JSON_ENTRY = 'h5p.json'
+
+
+def read_package_json(source) -> tuple[dict, dict]:
+    """
+    Read content.json and h5p.json from an .h5p package.
+
+    `source` may be a path or a binary file-like object (e.g. a Streamlit upload).
+    Only the two JSON entries are decompressed, the library files are never touched.
+    """
+    try:
+        with zipfile.ZipFile(source, 'r') as zip_ref:
+            content_json = json.loads(zip_ref.read(CONTENT_JSON_ENTRY).decode('utf-8'))
+            h5p_json = json.loads(zip_ref.read(H5P_JSON_ENTRY).decode('utf-8'))
+        return content_json, h5p_json
+    except KeyError as e:
+        logger.error(f"H5P package is missing an entry: {e}")
+        raise Exception(f"Not a package created by this tool: {str(e)}")
+    except (zipfile.BadZipFile, json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error(f"Error reading H5P package: {e}")
+        raise Exception(f"Failed to read H5P package: {str(e)}")
+
+
+def parse_content_json(content_json: dict, h5p_json: dict) -> dict:
+    """
+    Map a parsed content.json / h5p.json pair back to the results structure
+    used by main() and consumed by create_content_json.
+    """
+    results = {
+        'mcq': None,
+        'glossary': None,
+        'drag': None,
+        'welcome': None,
+        'topic': h5p_json.get('title') or h5p_json.get('extraTitle') or "Unbenannte Einheit",
+        'url': '',
+        'locale': h5p_json.get('language', DEFAULT_LOCALE)
+    }
+
+    # Metadata titles written by create_content_json in any locale, used to
+    # tell the two DragText blocks (Lückentext and Glossar) apart.
+    drag_titles = known_titles('dragTitle')
+    glossary_titles = known_titles('glossaryTitle')
+
+    blocks = [block.get('content', {}) for block in content_json.get('content', [])]
+    text_blocks_seen = 0
+
+    for block in blocks:
+        library = block.get('library', '')
+        params = block.get('params', {})
+        title = block.get('metadata', {}).get('title', '')
+
+        if library.startswith('H5P.AdvancedText'):
+            # The first text block is the welcome message, the second one the
+            # static "Verständnisfragen" header.
+            if text_blocks_seen == 0:
+                results['welcome'] = params.get('text')
+            text_blocks_seen += 1
+
+        elif library.startswith('H5P.Video'):
+            sources = params.get('sources') or [{}]
+            results['url'] = sources[0].get('path', '')
+
+        elif library.startswith('H5P.QuestionSet'):
+            questions = [q for q in params.get('questions', [])
+                         if q.get('library', '').startswith('H5P.MultiChoice')]
+            results['mcq'] = questions or None
+
+        elif library.startswith('H5P.DragText'):
+            if title in glossary_titles:
+                results['glossary'] = params
+            elif title in drag_titles:
+                results['drag'] = params
+            else:
+                logger.warning(f"Skipping DragText block with unknown title: {title}")
+
+        else:
+            logger.warning(f"Skipping unsupported library in package: {library}")
+
+    return results
+
+
+def import_h5p_package(source) -> dict:
+    """Load a previously generated .h5p package into the internal results structure."""
+    content_json, h5p_json = read_package_json(source)
+    return parse_content_json(content_json, h5p_json)
@@ -0,0 +1,311 @@
+"""
+Pluggable LLM backends for the generators.
+
+get_ai_analysis, get_welcome_message and translate_texts talk to an
+LLMBackend. Plain OpenAI-compatible clients are wrapped in OpenAIBackend, so
+callers can keep passing the client from get_openai_client. Two backends run
+without network access:
+
+- LocalBackend builds schema-valid welcome, MCQ, glossary and drag-the-words
+  output from transcript keywords, deterministically and in milliseconds,
+  for throughput tests, CI and degraded-mode service.
+- RecordedBackend serves previously recorded completions (the responses.json
+  of a benchmarks.prompt_eval corpus).
+
+The backend is chosen with $H5P_LLM_BACKEND (openai, local, recorded).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+
+from clients import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND_ENV = "H5P_LLM_BACKEND"
+# responses.json served by the recorded backend
+RECORDED_RESPONSES_ENV = "H5P_RECORDED_RESPONSES"
+
+BACKENDS = ('openai', 'local', 'recorded')
+
+
+@dataclass
+class Completion:
+    """Text of one completion; the token counts double as `usage` for the metrics."""
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMBackend(ABC):
+    """Interface of a chat model backend."""
+
+    name = "backend"
+
+    @abstractmethod
+    def complete(self, messages: list[dict], model: str, kind: str = "analysis", **options) -> Completion:
+        """
+        Answer a chat conversation. `kind` names the generator (welcome, mcq,
+        mcq_top_up, glossary, drag, translate); `options` are model settings
+        such as temperature that a backend may ignore.
+        """
+
+    def model_id(self, model: str) -> str:
+        """Model name for metrics and cache keys, qualified by the backend."""
+        return f"{self.name}:{model}"
+
+
+class OpenAIBackend(LLMBackend):
+    """Chat completions of an OpenAI-compatible client."""
+
+    name = "openai"
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, messages: list[dict], model: str, kind: str = "analysis", **options) -> Completion:
+        response = self.client.chat.completions.create(model=model, messages=messages, **options)
+        usage = getattr(response, 'usage', None)
+        return Completion(
+            content=response.choices[0].message.content,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+        )
+
+    def model_id(self, model: str) -> str:
+        # Unqualified, so metrics labels and result store keys stay as before
+        return model
+
+
+def as_backend(client) -> LLMBackend:
+    """`client` itself if it is a backend, otherwise wrapped in an OpenAIBackend."""
+    return client if isinstance(client, LLMBackend) else OpenAIBackend(client)
+
+
+def response_key(model: str, messages: list) -> str:
+    """Key of a recorded response: the model and the exact messages sent."""
+    payload = json.dumps({'model': model, 'messages': messages}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RecordedBackend(LLMBackend):
+    """
+    Serves recorded completions keyed by response_key(). Records hold content,
+    prompt_tokens, completion_tokens and latency; the recorded latency is
+    replayed scaled by `latency_scale`. Unrecorded requests go to `fallback`
+    if given, otherwise they fail.
+    """
+
+    name = "recorded"
+
+    def __init__(self, responses: dict, latency_scale: float = 0.0, fallback: LLMBackend = None):
+        self.responses = responses
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "RecordedBackend":
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(json.load(f), **kwargs)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading recorded responses: {e}")
+            raise Exception(f"Failed to load recorded responses from {path}: {str(e)}")
+
+    def complete(self, messages: list[dict], model: str, kind: str = "analysis", **options) -> Completion:
+        record = self.responses.get(response_key(model, messages))
+        if record is None:
+            if self.fallback is not None:
+                return self.fallback.complete(messages, model, kind, **options)
+            raise Exception("No recorded response for this prompt and model")
+        time.sleep(record.get('latency', 0) * self.latency_scale)
+        return Completion(record['content'], record.get('prompt_tokens', 0), record.get('completion_tokens', 0))
+
+
+# Local backend
+
+STOPWORDS = set("""
+aber alle allem allen aller alles also auch auf aus bei beim bereits bevor bist bitte dabei dadurch dafür dagegen
+daher damit dann darauf darum dass davon dazu dein deine dem den denen denn der deren des deshalb dessen die dies
+diese diesem diesen dieser dieses doch dort durch eben ein eine einem einen einer eines einfach einige etwa etwas
+euch euer für gegen genau gibt haben habe hast hatte hatten heute hier hinter ich ihm ihn ihnen ihr ihre ihrem
+ihren ihrer immer indem jede jedem jeden jeder jedes jetzt kann kannst kein keine können könnte machen macht mehr
+mein meine mich mir mit muss müssen nach nicht nichts noch nun nur oder ohne schon sehr sein seine seinem seinen
+seiner sich sie sind so sogar sollte sondern sowie über um und uns unser unsere unter viel viele vom von vor
+wann war waren warum was weil weiter welche welchem welchen welcher wenn wer werden wie wieder wir wird wirklich
+wo wohl wollen worden wurde wurden zum zur zwar zwischen
+about after again also another because been before being between both came come could does doing down each even
+every from have having here into just know like make many more most much must only other over really said same
+should since some such than that their them then there these they thing things think this those through very want
+well were what when where which while will with would your
+alors avec aussi avoir cela cette comme dans donc elle elles encore être fait faire leur leurs mais même nous
+pour plus quand quel quelle sans sont tout tous très vous
+anche come con della delle dello degli essere fare hanno loro molto nella nelle perché però questa questo
+quella quello sono tutto tutti
+""".split())
+
+_WORD_RE = re.compile(r"[^\W\d_]{4,}")
+
+
+def _windows(transcript: str, size: int = 20) -> list[str]:
+    """Sentences of the transcript, long or unpunctuated stretches cut into `size`-word windows."""
+    windows = []
+    for sentence in re.split(r"(?<=[.!?])\s+", transcript):
+        words = sentence.replace('*', '').split()
+        for i in range(0, len(words), size):
+            if len(words[i:i + size]) >= 5:
+                windows.append(" ".join(words[i:i + size]))
+    return windows
+
+
+def _keywords(transcript: str, limit: int = 24) -> list[str]:
+    """Most frequent content words, ties broken by first occurrence."""
+    counts = Counter()
+    first_seen = {}
+    spelling = {}
+    for position, match in enumerate(_WORD_RE.finditer(transcript)):
+        word = match.group(0)
+        key = word.lower()
+        if key in STOPWORDS:
+            continue
+        counts[key] += 1
+        first_seen.setdefault(key, position)
+        spelling.setdefault(key, word)
+    ranked = sorted(counts, key=lambda key: (-counts[key], first_seen[key]))
+    return [spelling[key] for key in ranked[:limit]]
+
+
+class LocalBackend(LLMBackend):
+    """
+    Deterministic offline generator. Output follows the JSON formats the
+    prompts ask for, built from the most frequent transcript keywords and the
+    sentences they occur in, so it is useful content but no substitute for a model.
+    """
+
+    name = "local"
+
+    def complete(self, messages: list[dict], model: str, kind: str = "analysis", **options) -> Completion:
+        prompt = messages[-1]['content']
+        kind = self._classify(kind, prompt)
+        if kind == 'translate':
+            # No offline translation, the texts are returned unchanged
+            texts = json.loads(prompt[prompt.rindex("Input:\n") + len("Input:\n"):])
+            return Completion(json.dumps({"translations": texts}, ensure_ascii=False))
+
+        transcript = prompt[prompt.rindex("Transcript:") + len("Transcript:"):] if "Transcript:" in prompt else prompt
+        keywords = _keywords(transcript)
+        windows = _windows(transcript)
+        if kind == 'welcome':
+            content = self._welcome(keywords)
+        elif kind in ('mcq', 'mcq_top_up'):
+            content = self._mcq(keywords, windows, prompt)
+        elif kind == 'glossary':
+            content = self._glossary(keywords, windows)
+        elif kind == 'drag':
+            content = self._drag(keywords, windows)
+        else:
+            raise Exception(f"The local backend cannot answer '{kind}' requests")
+        return Completion(json.dumps(content, ensure_ascii=False))
+
+    @staticmethod
+    def _classify(kind: str, prompt: str) -> str:
+        if kind != 'analysis':
+            return kind
+        for marker, detected in (('{"translations"', 'translate'), ('welcome_html', 'welcome'),
+                                 ('questions_list', 'mcq'), ('drag_the_words', 'drag'), ('glossary', 'glossary')):
+            if marker in prompt:
+                return detected
+        return kind
+
+    @staticmethod
+    def _occurrences(keywords: list[str], windows: list[str]) -> list[tuple[str, str]]:
+        """(keyword, window) pairs, each window used at most once."""
+        pairs, used = [], set()
+        for keyword in keywords:
+            pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+            for index, window in enumerate(windows):
+                if index not in used and pattern.search(window):
+                    used.add(index)
+                    pairs.append((keyword, window))
+                    break
+        return pairs
+
+    def _welcome(self, keywords: list[str]) -> dict:
+        topic = " ".join(keyword.capitalize() for keyword in keywords[:3]) or "Videoeinheit"
+        points = "".join(f"<li>{keyword.capitalize()}</li>" for keyword in keywords[:3])
+        return {
+            "topic": topic,
+            "welcome_html": (
+                f"<p>Willkommen zu dieser Einheit über {topic}!</p>"
+                f"<h3>❗ Wieso ist es wichtig?</h3><ul>{points}</ul>"
+                f"<h3>🎯 Lernziele</h3><ul><li>Die zentralen Begriffe des Videos kennen.</li>"
+                f"<li>Die Begriffe im Zusammenhang erklären.</li><li>Das Gelernte in den Übungen anwenden.</li></ul>"
+            )
+        }
+
+    def _mcq(self, keywords: list[str], windows: list[str], prompt: str) -> dict:
+        pairs = self._occurrences(keywords, windows)
+        count = len(pairs)
+        top_up = re.search(r"Generate EXACTLY (\d+) additional questions", prompt)
+        if top_up:
+            # Existing questions are listed after the instructions; continue after them
+            listed = prompt.find("existing questions:", top_up.end())
+            existing = prompt[listed:prompt.index("\n\nTranscript:\n", listed)].count("\n- ") if listed != -1 else 0
+            pairs = pairs[existing:]
+            count = int(top_up.group(1))
+
+        questions = []
+        for index, (keyword, window) in enumerate(pairs[:count]):
+            gap = re.sub(rf"\b{re.escape(keyword)}\b", "___", window, flags=re.IGNORECASE)
+            distractors = [other for other in keywords if other.lower() != keyword.lower()]
+            distractors = [distractors[(index + offset) % len(distractors)] for offset in (1, 2)] if distractors else []
+            questions.append({
+                "bloom_level": "Erinnern",
+                "question_text": f"Welcher Begriff passt in die Lücke? «{gap}»",
+                "answers": [
+                    {"text": keyword, "is_correct": True,
+                     "feedback": f"✅ Richtig, im Video heisst es **{keyword}**."},
+                    *({"text": other, "is_correct": False,
+                       "feedback": f"❌ Falsch, richtig ist **{keyword}**."} for other in dict.fromkeys(distractors)),
+                ]
+            })
+        return {"questions_list": questions}
+
+    def _glossary(self, keywords: list[str], windows: list[str]) -> dict:
+        entries = [f"*{keyword}:Beginnt mit «{keyword[0]}»*: {window.replace(':', ',')}"
+                   for keyword, window in self._occurrences(keywords[:8], windows)]
+        return {"glossary": {"output_template": entries}}
+
+    def _drag(self, keywords: list[str], windows: list[str]) -> dict:
+        sentences = []
+        for keyword, window in self._occurrences(keywords[:6], windows):
+            pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+            sentences.append(pattern.sub(
+                lambda match: f"*{match.group(0)}:Begriff mit {len(match.group(0))} Buchstaben*", window, count=1))
+        return {"drag_the_words": {"output_template": sentences}}
+
+
+def get_backend(name: str = None, api_key: str = None) -> LLMBackend:
+    """
+    Backend `name` (default $H5P_LLM_BACKEND, else openai). The recorded backend
+    reads $H5P_RECORDED_RESPONSES and answers unrecorded requests locally.
+    """
+    name = name or os.environ.get(LLM_BACKEND_ENV, "openai")
+    if name == 'openai':
+        if not api_key:
+            raise Exception("An OpenAI API key is required")
+        return OpenAIBackend(get_openai_client(api_key))
+    if name == 'local':
+        return LocalBackend()
+    if name == 'recorded':
+        path = os.environ.get(RECORDED_RESPONSES_ENV)
+        if not path:
+            raise Exception(f"${RECORDED_RESPONSES_ENV} must point to a responses.json file")
+        return RecordedBackend.from_file(path, fallback=LocalBackend())
+    raise Exception(f"Unknown LLM backend: {name}")
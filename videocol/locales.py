@@ -0,0 +1,66 @@
+import json
+import logging
+import time
+from functools import lru_cache
+
+from llm_backends import as_backend
+from metrics import metrics
+from resources import available_locales, load_prompt, locale_catalog
+
+logger = logging.getLogger(__name__)
+
+# Locale of the UI strings when none is given, matches the original German packages
+DEFAULT_LOCALE = "de"
+
+LANGUAGE_NAMES = {"de": "German", "fr": "French", "it": "Italian"}
+
+
+@lru_cache(maxsize=None)
+def _replacements(locale: str) -> tuple:
+    return tuple(locale_catalog(locale)['replacements'].items())
+
+
+def normalize_text(text: str, locale: str = DEFAULT_LOCALE) -> str:
+    """Locale-specific text normalization, e.g. ß → ss for Swiss German."""
+    for old, new in _replacements(locale):
+        text = text.replace(old, new)
+    return text
+
+
+def known_titles(key: str) -> set[str]:
+    """All localized variants of a column title, e.g. key='glossaryTitle'."""
+    return {locale_catalog(locale)['column'][key] for locale in available_locales()}
+
+
+def translate_texts(client, texts: list[str], locale: str, model: str = "gpt-4o-mini") -> list[str]:
+    """
+    Translate a list of content strings into `locale` with a single LLM call.
+    Raises if the model does not return one translation per input string.
+    """
+    if not texts:
+        return []
+
+    backend = as_backend(client)
+    language = LANGUAGE_NAMES.get(locale, locale)
+    prompt = load_prompt("translate").replace("{language}", language)
+    start = time.perf_counter()
+    completion = backend.complete(
+        [
+            {"role": "system", "content": "You are a precise translator. Always respond with valid JSON."},
+            {"role": "user", "content": prompt + json.dumps(texts, ensure_ascii=False)}
+        ],
+        model, kind="translate",
+        response_format={"type": "json_object"}
+    )
+    metrics.record_llm_call("translate", backend.model_id(model), time.perf_counter() - start, completion)
+
+    content = completion.content.strip()
+    try:
+        translations = json.loads(content)['translations']
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.error(f"Error parsing translation response: {e}")
+        raise Exception(f"Failed to translate content to {language}: {str(e)}")
+
+    if not isinstance(translations, list) or len(translations) != len(texts):
+        raise Exception(f"Translation to {language} returned {len(translations)} strings, expected {len(texts)}")
+    return [str(translation) for translation in translations]
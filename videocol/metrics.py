@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# If set, the Prometheus text exposition is rewritten to this file after every run
+METRICS_FILE_ENV = "H5P_METRICS_FILE"
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """
+    Process-wide stage timings, LLM usage counters and gauges.
+
+    Stage durations are kept as count/sum pairs (a Prometheus summary without
+    quantiles). Events of the current thread can additionally be collected
+    with `collect()`, which is what the in-app timing panel shows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: [0, 0.0])  # labels -> [count, sum]
+        self._counters = defaultdict(float)  # (name, labels) -> value
+        self._gauges = {}  # (name, labels) -> value
+        self._local = threading.local()
+
+    def _emit(self, event: dict):
+        collector = getattr(self._local, 'collector', None)
+        if collector is not None:
+            collector.append(event)
+
+    def observe(self, stage: str, seconds: float, **labels):
+        key = (('stage', stage),) + tuple(sorted(labels.items()))
+        with self._lock:
+            self._durations[key][0] += 1
+            self._durations[key][1] += seconds
+        self._emit({'stage': stage, 'seconds': round(seconds, 4), **labels})
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Time a block of work as one pipeline stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_llm_call(self, kind: str, model: str, seconds: float, usage=None):
+        """Record latency and token usage of one chat completion (`usage` is response.usage)."""
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        labels = {'kind': kind, 'model': model}
+
+        self.increment('h5p_llm_calls_total', cache_hit='false', **labels)
+        self.increment('h5p_llm_prompt_tokens_total', prompt_tokens, **labels)
+        self.increment('h5p_llm_completion_tokens_total', completion_tokens, **labels)
+        self.observe('llm_call', seconds, **labels)
+        self._emit({'stage': 'llm_tokens', 'kind': kind, 'model': model,
+                    'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens})
+
+    def record_llm_cache_hit(self, kind: str, model: str):
+        """Count a completion served from the result store; it has no latency or tokens to record."""
+        self.increment('h5p_llm_calls_total', cache_hit='true', kind=kind, model=model)
+
+    @contextmanager
+    def collect(self):
+        """Collect the events recorded by the current thread, e.g. for one generation run."""
+        events = []
+        previous = getattr(self._local, 'collector', None)
+        self._local.collector = events
+        try:
+            yield events
+        finally:
+            self._local.collector = previous
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP h5p_stage_duration_seconds Duration of pipeline stages.",
+            "# TYPE h5p_stage_duration_seconds summary",
+        ]
+        with self._lock:
+            durations = dict(self._durations)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        for labels, (count, total) in sorted(durations.items()):
+            lines.append(f"h5p_stage_duration_seconds_count{_format_labels(labels)} {count}")
+            lines.append(f"h5p_stage_duration_seconds_sum{_format_labels(labels)} {total:.6f}")
+
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str = None):
+        """Write the exposition to `path` (or $H5P_METRICS_FILE) for a node-exporter textfile collector."""
+        path = path or os.environ.get(METRICS_FILE_ENV)
+        if not path:
+            return
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics file: {e}")
+
+
+metrics = Metrics()
+
+
+def timed(stage: str):
+    """Decorator recording the wrapped function's duration as a pipeline stage."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from urllib.parse import urlparse
+
+from youtube_url import parse_youtube_url
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of videos taken from one playlist or channel
+DEFAULT_LIMIT = 50
+
+# Playlist backend: "yt-dlp" (default) or "stub"
+PLAYLIST_BACKEND_ENV = "H5P_PLAYLIST_BACKEND"
+# JSON file mapping playlist IDs or channel paths to video IDs, for the stub backend
+PLAYLIST_STUB_FILE_ENV = "H5P_PLAYLIST_STUB_FILE"
+
+_CHANNEL_PATH_RE = re.compile(r"^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)")
+
+
+class PlaylistBackend(ABC):
+    """Resolves a playlist or channel URL to its video IDs."""
+
+    @abstractmethod
+    def list_video_ids(self, url: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        ...
+
+
+class StubPlaylistBackend(PlaylistBackend):
+    """Offline backend with fixed contents, keyed by playlist ID or channel path (e.g. '@handle')."""
+
+    def __init__(self, contents: dict):
+        self.contents = contents
+
+    @classmethod
+    def from_file(cls, path: str) -> "StubPlaylistBackend":
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def list_video_ids(self, url: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        key = playlist_key(url)
+        if key not in self.contents:
+            raise Exception(f"Unknown playlist or channel: {key}")
+        return list(self.contents[key])[:limit]
+
+
+class YtDlpPlaylistBackend(PlaylistBackend):
+    """Resolves playlists and channels with yt-dlp (optional dependency), without downloading videos."""
+
+    def list_video_ids(self, url: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        try:
+            import yt_dlp
+        except ImportError:
+            raise Exception("Playlist expansion requires yt-dlp: pip install yt-dlp")
+
+        if is_channel_url(url) and not urlparse(url).path.rstrip("/").endswith("/videos"):
+            url = url.rstrip("/") + "/videos"
+
+        options = {'extract_flat': 'in_playlist', 'playlistend': limit, 'quiet': True, 'skip_download': True}
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+        entries = info.get('entries') or []
+        return [entry['id'] for entry in entries if entry.get('id')][:limit]
+
+
+def get_playlist_backend(name: str = None) -> PlaylistBackend:
+    """Backend named `name`, $H5P_PLAYLIST_BACKEND if not given."""
+    name = name or os.environ.get(PLAYLIST_BACKEND_ENV, 'yt-dlp')
+    if name == 'yt-dlp':
+        return YtDlpPlaylistBackend()
+    if name == 'stub':
+        path = os.environ.get(PLAYLIST_STUB_FILE_ENV)
+        if not path:
+            raise Exception(f"The stub playlist backend needs ${PLAYLIST_STUB_FILE_ENV}")
+        return StubPlaylistBackend.from_file(path)
+    raise Exception(f"Unknown playlist backend: {name}")
+
+
+def is_channel_url(url: str) -> bool:
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    return bool(_CHANNEL_PATH_RE.match(parsed.path))
+
+
+def playlist_key(url: str) -> str:
+    """Playlist ID, or the channel path such as '@handle' or 'channel/UC...'."""
+    if is_channel_url(url):
+        parsed = urlparse(url if "://" in url else "https://" + url)
+        return _CHANNEL_PATH_RE.match(parsed.path).group(1)
+    ref = parse_youtube_url(url)
+    if not ref.playlist:
+        raise Exception(f"Not a playlist or channel URL: {url}")
+    return ref.playlist
+
+
+def expand_videos(url: str, backend: PlaylistBackend = None, limit: int = DEFAULT_LIMIT) -> list[str]:
+    """
+    Video IDs behind a URL: all videos of a playlist or channel, or the
+    single video of a plain video URL. Duplicates are dropped, order is kept.
+    """
+    if not is_channel_url(url):
+        ref = parse_youtube_url(url)
+        if not ref.playlist:
+            return [ref.video_id]
+
+    backend = backend or get_playlist_backend()
+    video_ids = backend.list_video_ids(url, limit)
+    logger.info(f"Expanded {url} to {len(video_ids)} videos")
+    return list(dict.fromkeys(video_ids))[:limit]
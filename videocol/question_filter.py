@@ -0,0 +1,189 @@
+import logging
+import random
+import re
+import zlib
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Similarity above which two questions (or glossary definitions) count as duplicates
+DEFAULT_THRESHOLD = 0.6
+
+# MinHash parameters: 64 hash functions of the form (a * x + b) % p with a, b
+# uniform in [1, p), seeded so signatures are stable across processes
+_NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(1, _PRIME)) for _ in range(_NUM_PERM)]
+del _rng
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Glossary lines look like "*term:hint*: definition"
+_GLOSSARY_RE = re.compile(r"^\*([^:*]+):?[^*]*\*:?\s*(.*)$")
+
+
+def _normalize(text: str) -> list[str]:
+    """Lower-case word tokens without markup like **bold** or emoji."""
+    return _WORD_RE.findall(text.lower())
+
+
+def shingles(text: str, size: int = 4) -> set[str]:
+    """
+    Character n-gram shingles of the normalized text.
+    Questions are short, so character shingles tolerate small rewordings far
+    better than word shingles.
+    """
+    normalized = " ".join(_normalize(text))
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash(shingle_set: set[str]) -> list[int]:
+    """MinHash signature of a shingle set."""
+    if not shingle_set:
+        return [0] * _NUM_PERM
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def signature_similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / _NUM_PERM
+
+
+@lru_cache(maxsize=1)
+def _embedding_model():
+    """The sentence-transformers model, loaded once per process; None if not installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("sentence-transformers not installed, falling back to MinHash similarity")
+        return None
+    return SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+
+
+def _embedding_similarity_matrix(texts: list[str]):
+    """
+    Cosine similarities from a local sentence-transformers model.
+    Returns None if the optional dependency is not installed.
+    """
+    model = _embedding_model()
+    if model is None:
+        return None
+    embeddings = model.encode(texts, normalize_embeddings=True)
+    return (embeddings @ embeddings.T).tolist()
+
+
+def _find_duplicates(texts: list[str], threshold: float, use_embeddings: bool) -> set[int]:
+    """Indices of texts that are near-duplicates of an earlier text."""
+    matrix = _embedding_similarity_matrix(texts) if use_embeddings else None
+    if matrix is None:
+        signatures = [minhash(shingles(text)) for text in texts]
+
+        def similarity(i, j):
+            return signature_similarity(signatures[i], signatures[j])
+    else:
+        def similarity(i, j):
+            return matrix[i][j]
+
+    duplicates = set()
+    for i in range(len(texts)):
+        if i in duplicates:
+            continue
+        for j in range(i + 1, len(texts)):
+            if j not in duplicates and similarity(i, j) >= threshold:
+                duplicates.add(j)
+    return duplicates
+
+
+def question_problems(question: dict) -> list[str]:
+    """Structural problems of a single H5P MultiChoice question (empty list if valid)."""
+    params = question.get('params', {})
+    answers = params.get('answers', [])
+    problems = []
+
+    if not params.get('question', '').strip():
+        problems.append("empty question text")
+    if len(answers) < 2:
+        problems.append(f"only {len(answers)} answers")
+    if not any(answer.get('correct') for answer in answers):
+        problems.append("no correct answer")
+    if any(not answer.get('text', '').strip() for answer in answers):
+        problems.append("empty answer text")
+    if any(not answer.get('tipsAndFeedback', {}).get('chosenFeedback', '').strip() for answer in answers):
+        problems.append("missing feedback")
+    return problems
+
+
+def filter_questions(questions: list, target: int, threshold: float = DEFAULT_THRESHOLD,
+                     use_embeddings: bool = False) -> tuple[list, int]:
+    """
+    Drop malformed and near-duplicate questions.
+    Returns (kept_questions, deficit) where deficit is how many questions are
+    missing to reach `target`, i.e. how many a top-up request should ask for.
+    """
+    valid = []
+    for question in questions:
+        problems = question_problems(question)
+        if problems:
+            logger.info(f"Dropping question ({', '.join(problems)}): {question.get('params', {}).get('question', '')}")
+        else:
+            valid.append(question)
+
+    # Compare on question text plus the correct answers, so that two questions
+    # asking the same thing in different words still collide.
+    texts = [
+        " ".join([q['params']['question']] +
+                 [a['text'] for a in q['params']['answers'] if a.get('correct')])
+        for q in valid
+    ]
+    duplicates = _find_duplicates(texts, threshold, use_embeddings)
+    for index in sorted(duplicates):
+        logger.info(f"Dropping near-duplicate question: {valid[index]['params']['question']}")
+
+    kept = [q for i, q in enumerate(valid) if i not in duplicates]
+    return kept, max(0, target - len(kept))
+
+
+def filter_glossary(glossary: dict, threshold: float = DEFAULT_THRESHOLD,
+                    use_embeddings: bool = False) -> tuple[dict, int]:
+    """
+    Remove repeated terms and near-duplicate definitions from glossary params.
+    Returns (glossary_params, removed_count). If no line has the expected
+    "*term:hint*: definition" format, the params are returned unfiltered.
+    """
+    lines = [line for line in glossary.get('textField', '').split("\n") if line.strip()]
+    seen_terms = set()
+    unique = []
+    for line in lines:
+        match = _GLOSSARY_RE.match(line.strip())
+        if not match:
+            logger.info(f"Dropping malformed glossary entry: {line}")
+            continue
+        term = " ".join(_normalize(match.group(1)))
+        if term in seen_terms:
+            logger.info(f"Dropping repeated glossary term: {match.group(1)}")
+            continue
+        seen_terms.add(term)
+        unique.append((line, match.group(2)))
+
+    if not unique:
+        logger.warning("No glossary entry matched the expected format, keeping the glossary unfiltered")
+        return glossary, 0
+
+    duplicates = _find_duplicates([definition for _, definition in unique], threshold, use_embeddings)
+    kept = [line for i, (line, _) in enumerate(unique) if i not in duplicates]
+
+    return {**glossary, 'textField': "\n".join(kept)}, len(lines) - len(kept)
+
+
+def top_up_instruction(count: int, existing_questions: list) -> str:
+    """Prompt suffix asking only for the missing questions."""
+    existing = "\n".join(f"- {q['params']['question']}" for q in existing_questions)
+    return (
+        f"\n\n//top_up\n"
+        f"- Generate EXACTLY {count} additional questions, not more.\n"
+        f"- Every question needs at least one correct answer and feedback for every answer.\n"
+        f"- Do NOT repeat or paraphrase any of these existing questions:\n{existing}\n"
+    )
@@ -0,0 +1,129 @@
+"""
+Versioned resources loaded once per process.
+
+Streamlit re-executes app.py on every rerun, so anything cached at module
+level there is rebuilt each time. Keeping the caches in this imported module
+means prompts, the h5p.json skeleton and the template base are read only once.
+"""
+import copy
+import io
+import json
+import logging
+import os
+import threading
+import zipfile
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "resources")
+TEMPLATE_ZIP_PATH = os.path.join(os.path.dirname(__file__), "template.zip")
+
+# Entries written per package, everything else comes from the template
+GENERATED_ENTRIES = ('content/content.json', 'h5p.json')
+
+
+@lru_cache(maxsize=None)
+def load_manifest() -> dict:
+    """Resource versions currently in use, see resources/manifest.json."""
+    with open(os.path.join(RESOURCES_DIR, "manifest.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_prompt(name: str, version: str = None) -> str:
+    """Prompt text of `name` (mcq, glossary, drag, welcome); the manifest version by default."""
+    version = version or load_manifest()['prompts'][name]
+    with open(os.path.join(RESOURCES_DIR, "prompts", f"{name}.{version}.txt"), encoding='utf-8') as f:
+        return f.read()
+
+
+def prompt_versions() -> dict:
+    """Mapping of prompt name to the version in use."""
+    return dict(load_manifest()['prompts'])
+
+
+def available_prompt_versions(name: str) -> list[str]:
+    """Versions of prompt `name` with a file under resources/prompts, e.g. ['v1', 'v2']."""
+    prefix = f"{name}."
+    return sorted(file_name[len(prefix):-len(".txt")] for file_name in os.listdir(os.path.join(RESOURCES_DIR, "prompts"))
+                  if file_name.startswith(prefix) and file_name.endswith(".txt"))
+
+
+def prompt_id(name: str, version: str = None) -> str:
+    """Registry id of a prompt, e.g. 'mcq:v1'; the manifest version by default."""
+    version = version or load_manifest()['prompts'][name]
+    if version not in available_prompt_versions(name):
+        raise Exception(f"Unknown prompt version {name}:{version}")
+    return f"{name}:{version}"
+
+
+@lru_cache(maxsize=None)
+def _load_h5p_skeleton(version: str) -> dict:
+    with open(os.path.join(RESOURCES_DIR, "h5p", f"h5p.{version}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_h5p_skeleton() -> dict:
+    """Fresh copy of the h5p.json skeleton, safe to modify."""
+    return copy.deepcopy(_load_h5p_skeleton(load_manifest()['h5p']))
+
+
+_template_lock = threading.Lock()
+_template_base = {}
+
+
+def template_base(template_zip_path: str = TEMPLATE_ZIP_PATH) -> bytes:
+    """
+    The template as a ready-made zip without the generated entries.
+
+    Built once per template file. Packages are created by appending the two
+    generated entries to a copy of these bytes, so the ~500 library files are
+    copied as-is instead of being decompressed and recompressed every time.
+    """
+    with _template_lock:
+        if template_zip_path not in _template_base:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_new:
+                with zipfile.ZipFile(template_zip_path, 'r') as zip_ref:
+                    for item in zip_ref.infolist():
+                        if item.filename not in GENERATED_ENTRIES:
+                            zip_new.writestr(item, zip_ref.read(item.filename))
+            _template_base[template_zip_path] = buffer.getvalue()
+            logger.info(f"Template index built from {template_zip_path}")
+        return _template_base[template_zip_path]
+
+
+_prebuild_started = False
+
+
+def prebuild_template(template_zip_path: str = TEMPLATE_ZIP_PATH):
+    """Build the template base in the background once per process, ahead of the first download."""
+    global _prebuild_started
+    with _template_lock:
+        if _prebuild_started or template_zip_path in _template_base:
+            return
+        _prebuild_started = True
+    if os.path.exists(template_zip_path):
+        threading.Thread(target=template_base, args=(template_zip_path,), daemon=True).start()
+
+
+@lru_cache(maxsize=None)
+def _load_locale(locale: str) -> dict:
+    with open(os.path.join(RESOURCES_DIR, "locales", f"{locale}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_locale(locale: str) -> dict:
+    """Fresh copy of the UI string catalog of `locale` (de, fr, it), safe to embed and modify."""
+    return copy.deepcopy(_load_locale(locale))
+
+
+def locale_catalog(locale: str) -> dict:
+    """The shared, cached catalog of `locale`; read-only, copy what gets embedded or modified."""
+    return _load_locale(locale)
+
+
+def available_locales() -> list[str]:
+    """Locales with a catalog under resources/locales."""
+    return sorted(name[:-5] for name in os.listdir(os.path.join(RESOURCES_DIR, "locales")) if name.endswith(".json"))
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# If set, finished units are also kept in this SQLite file and shared between processes
+RESULT_STORE_DB_ENV = "H5P_RESULT_STORE_DB"
+# Age in seconds after which stored units are regenerated, one week if unset
+RESULT_STORE_TTL_ENV = "H5P_RESULT_STORE_TTL_SECONDS"
+
+
+def make_key(video: str, language: str, model: str, content_types, prompt_version: str) -> str:
+    """Stable key for one generated unit. Units are generated in one language, so the locale is not part of it."""
+    payload = json.dumps({
+        'video': video,
+        'language': language,
+        'model': model,
+        'content_types': sorted(content_types),
+        'prompt_version': prompt_version,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def make_translation_key(results: dict, locale: str, model: str, prompt_version: str) -> str:
+    """Stable key for the translation of generated results into `locale`, derived from their content."""
+    payload = json.dumps({
+        'results': results,
+        'locale': locale,
+        'model': model,
+        'prompt_version': prompt_version,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _InFlight:
+    """A computation other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultStore:
+    """
+    Finished-unit store with single-flight semantics.
+
+    Concurrent `get_or_compute` calls for the same key run `compute` once; the
+    other callers block until it finishes and share its value. Values live in a
+    bounded in-memory LRU and, if `db_path` is given, in SQLite, where an
+    `inflight` lease table extends the single-flight guarantee across processes.
+    Values expire `ttl_seconds` after they were stored. Values must be JSON-serializable.
+    """
+
+    def __init__(self, db_path: str = None, max_entries: int = 256, lease_seconds: float = 600,
+                 poll_interval: float = 0.5, ttl_seconds: float = 7 * 24 * 3600):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (created, value)
+        self._inflight = {}
+        self._max_entries = max_entries
+        self._db_path = db_path
+        self._lease_seconds = lease_seconds
+        self._poll_interval = poll_interval
+        self._ttl_seconds = ttl_seconds
+        self._owner = uuid.uuid4().hex
+        if db_path:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, created REAL)")
+                db.execute("CREATE TABLE IF NOT EXISTS inflight (key TEXT PRIMARY KEY, owner TEXT, started REAL)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        db = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _remember(self, key: str, value, created: float):
+        with self._lock:
+            self._memory[key] = (created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_entries:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str):
+        """Value from the in-memory LRU, None if missing or expired. Call with the lock held."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if created < time.time() - self._ttl_seconds:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._memory_get(key)
+            if value is not None:
+                return value
+        if self._db_path:
+            with self._connect() as db:
+                row = db.execute("SELECT value, created FROM results WHERE key = ? AND created >= ?",
+                                 (key, time.time() - self._ttl_seconds)).fetchone()
+            if row:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                return value
+        return None
+
+    def put(self, key: str, value):
+        now = time.time()
+        self._remember(key, value, now)
+        if self._db_path:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                           (key, json.dumps(value, ensure_ascii=False), now))
+                # Expired rows are dropped on write, so the table does not grow without bound
+                db.execute("DELETE FROM results WHERE created < ?", (now - self._ttl_seconds,))
+
+    def _acquire_lease(self, key: str) -> bool:
+        """Claim the cross-process computation of `key`; False if another process holds a live lease."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM inflight WHERE key = ? AND started < ?", (key, now - self._lease_seconds))
+            cursor = db.execute("INSERT OR IGNORE INTO inflight (key, owner, started) VALUES (?, ?, ?)",
+                                (key, self._owner, now))
+            return cursor.rowcount == 1
+
+    def _release_lease(self, key: str):
+        with self._connect() as db:
+            db.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, self._owner))
+
+    def _wait_for_other_process(self, key: str):
+        """Poll until another process stores `key` or gives up its lease."""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            if self._acquire_lease(key):
+                return None
+            time.sleep(self._poll_interval)
+
+    def _compute(self, key: str, compute, cacheable):
+        if self._db_path:
+            if not self._acquire_lease(key):
+                value = self._wait_for_other_process(key)
+                if value is not None:
+                    return value, 'shared'
+            try:
+                value = compute()
+                if cacheable(value):
+                    self.put(key, value)
+                return value, 'miss'
+            finally:
+                self._release_lease(key)
+
+        value = compute()
+        if cacheable(value):
+            self.put(key, value)
+        return value, 'miss'
+
+    def get_or_compute(self, key: str, compute, cacheable=lambda value: True) -> tuple[object, str]:
+        """
+        Return (value, outcome) where outcome is 'hit' (stored), 'shared'
+        (waited on an identical in-flight request) or 'miss' (computed here).
+        Exceptions from `compute` propagate to every waiting caller and nothing is stored.
+        Values for which `cacheable` returns False are handed to the waiting
+        callers but not stored, e.g. degraded units that should be retried.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, 'hit'
+
+        with self._lock:
+            # Re-check under the lock, the value may have been stored in the meantime
+            value = self._memory_get(key)
+            if value is not None:
+                return value, 'hit'
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = _InFlight()
+
+        if not owner:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value, 'shared'
+
+        try:
+            inflight.value, outcome = self._compute(key, compute, cacheable)
+            return inflight.value, outcome
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide store, SQLite-backed if $H5P_RESULT_STORE_DB is set."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            db_path = os.environ.get(RESULT_STORE_DB_ENV)
+            if db_path:
+                logger.info(f"Using SQLite result store at {db_path}")
+            ttl_seconds = os.environ.get(RESULT_STORE_TTL_ENV)
+            if ttl_seconds:
+                _store = ResultStore(db_path=db_path, ttl_seconds=float(ttl_seconds))
+            else:
+                _store = ResultStore(db_path=db_path)
+        return _store
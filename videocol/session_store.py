@@ -0,0 +1,238 @@
+"""
+Memory-bounded storage for per-session payloads.
+
+Streamlit keeps st.session_state in memory for every connected browser tab.
+The app therefore only keeps a session handle there and stores transcripts,
+results and package bytes here: small values in memory, large ones spilled
+to disk with a bounded in-memory cache in front. Sessions have a storage
+quota and are dropped after being idle for a while.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Spill directory; a per-process temporary directory if unset
+SESSION_SPILL_DIR_ENV = "H5P_SESSION_SPILL_DIR"
+
+_MISSING = object()
+
+
+def _serialize(value) -> tuple[bytes, str]:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value), 'bytes'
+    return json.dumps(value, ensure_ascii=False).encode('utf-8'), 'json'
+
+
+def _deserialize(data: bytes, kind: str):
+    return data if kind == 'bytes' else json.loads(data.decode('utf-8'))
+
+
+class _Payload:
+    """One stored value; `value` is None while it only lives on disk."""
+
+    def __init__(self, size: int, kind: str, value=None, path: str = None):
+        self.size = size
+        self.kind = kind
+        self.value = value
+        self.path = path
+
+
+class SessionStore:
+    """
+    Values are JSON-serializable objects or bytes. Values of at least
+    `spill_bytes` are written to disk; up to `memory_limit_bytes` of them
+    stay cached in memory (LRU across all sessions). A session may hold at
+    most `session_quota_bytes` and is removed after `idle_seconds` without access.
+    """
+
+    def __init__(self, spill_dir: str = None, spill_bytes: int = 64 * 1024, memory_limit_bytes: int = 256 * 1024 * 1024,
+                 session_quota_bytes: int = 512 * 1024 * 1024, idle_seconds: float = 2 * 3600):
+        self._spill_dir = spill_dir or tempfile.mkdtemp(prefix="h5p-sessions-")
+        self._spill_bytes = spill_bytes
+        self._memory_limit = memory_limit_bytes
+        self._quota = session_quota_bytes
+        self._idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sessions = {}  # session id -> {name: _Payload}
+        self._last_access = {}
+        self._cache = OrderedDict()  # (session id, name) of spilled payloads held in memory
+        self._cached_bytes = 0
+        self._last_expiry = time.time()
+
+    def _session_dir(self, session_id: str) -> str:
+        if not session_id.isalnum():
+            raise Exception(f"Invalid session id: {session_id}")
+        return os.path.join(self._spill_dir, session_id)
+
+    def _touch(self, session_id: str):
+        now = time.time()
+        self._last_access[session_id] = now
+        self._sessions.setdefault(session_id, {})
+        # Expiry is checked at most once a minute, piggybacking on regular access
+        if now - self._last_expiry > 60:
+            self._last_expiry = now
+            for idle_id in [sid for sid, last in self._last_access.items() if now - last > self._idle_seconds]:
+                logger.info(f"Dropping idle session {idle_id}")
+                self._drop(idle_id)
+
+    def _uncache(self, key: tuple):
+        payload = self._cache.pop(key, None)
+        if payload is not None:
+            self._cached_bytes -= payload.size
+            payload.value = None
+
+    def _cache_value(self, key: tuple, payload: _Payload):
+        self._uncache(key)
+        if payload.size > self._memory_limit:
+            return
+        self._cache[key] = payload
+        self._cached_bytes += payload.size
+        while self._cached_bytes > self._memory_limit:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted.size
+            evicted.value = None
+
+    def _remove(self, session_id: str, name: str):
+        payload = self._sessions.get(session_id, {}).pop(name, None)
+        if payload is None:
+            return
+        self._uncache((session_id, name))
+        if payload.path:
+            try:
+                os.remove(payload.path)
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, session_id: str):
+        for name in list(self._sessions.get(session_id, {})):
+            self._remove(session_id, name)
+        self._sessions.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def _update_gauges(self):
+        memory = self._cached_bytes + sum(payload.size for payloads in self._sessions.values()
+                                          for payload in payloads.values() if payload.path is None)
+        disk = sum(payload.size for payloads in self._sessions.values()
+                   for payload in payloads.values() if payload.path)
+        metrics.set_gauge('h5p_session_memory_bytes', memory)
+        metrics.set_gauge('h5p_session_disk_bytes', disk)
+        metrics.set_gauge('h5p_sessions_active', len(self._sessions))
+
+    def session_bytes(self, session_id: str) -> int:
+        with self._lock:
+            return sum(payload.size for payload in self._sessions.get(session_id, {}).values())
+
+    def put(self, session_id: str, name: str, value):
+        """Store `value` under `name`; None removes it. Raises if the session quota would be exceeded."""
+        if value is None:
+            self.delete(session_id, name)
+            return
+        data, kind = _serialize(value)
+        with self._lock:
+            self._touch(session_id)
+            payloads = self._sessions[session_id]
+            used = sum(payload.size for key, payload in payloads.items() if key != name)
+            if used + len(data) > self._quota:
+                raise Exception(f"Session storage quota of {self._quota // (1024 * 1024)} MB exceeded")
+            self._remove(session_id, name)
+
+            if len(data) < self._spill_bytes:
+                payloads[name] = _Payload(len(data), kind, value)
+            else:
+                path = os.path.join(self._session_dir(session_id), f"{name}.{kind}")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+                payload = payloads[name] = _Payload(len(data), kind, value, path)
+                self._cache_value((session_id, name), payload)
+            self._update_gauges()
+
+    def contains(self, session_id: str, name: str) -> bool:
+        """Whether `name` is stored, without loading a spilled value from disk."""
+        with self._lock:
+            self._touch(session_id)
+            return name in self._sessions[session_id]
+
+    def get(self, session_id: str, name: str, default=None):
+        with self._lock:
+            self._touch(session_id)
+            payload = self._sessions[session_id].get(name)
+            if payload is None:
+                return default
+            if payload.value is not None:
+                if payload.path:
+                    self._cache.move_to_end((session_id, name))
+                return payload.value
+            path = payload.path
+
+        try:
+            with open(path, 'rb') as f:
+                value = _deserialize(f.read(), payload.kind)
+        except FileNotFoundError:
+            return default
+
+        with self._lock:
+            if self._sessions.get(session_id, {}).get(name) is payload:
+                payload.value = value
+                self._cache_value((session_id, name), payload)
+                self._update_gauges()
+        return value
+
+    def delete(self, session_id: str, name: str):
+        with self._lock:
+            self._remove(session_id, name)
+            self._update_gauges()
+
+    def drop_session(self, session_id: str):
+        with self._lock:
+            self._drop(session_id)
+            self._update_gauges()
+
+
+class SessionData:
+    """Attribute-style view of one session in the store, like st.session_state."""
+
+    def __init__(self, store: SessionStore, session_id: str):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_session_id', session_id)
+
+    def get(self, name: str, default=None):
+        return self._store.get(self._session_id, name, default)
+
+    def __getattr__(self, name: str):
+        value = self._store.get(self._session_id, name, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(name)
+        return value
+
+    def __setattr__(self, name: str, value):
+        self._store.put(self._session_id, name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return self._store.contains(self._session_id, name)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide store, spilling to $H5P_SESSION_SPILL_DIR if set."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            spill_dir = os.environ.get(SESSION_SPILL_DIR_ENV)
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            _store = SessionStore(spill_dir=spill_dir)
+        return _store
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live at the top of the videocol directory, as `streamlit run app.py` sees them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,161 @@
+import asyncio
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+
+import api
+import clients
+import result_store
+from benchmarks.fakes import FakeOpenAI, FakeTranscriptApi
+from result_store import ResultStore
+
+URL = "https://youtu.be/abcdefghijk"
+AUTH = [(b'authorization', b'Bearer test-key')]
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    """Fake YouTube, no artifact store and a fresh result store for every test."""
+    monkeypatch.delenv("H5P_ARTIFACT_STORE_DIR", raising=False)
+    monkeypatch.delenv("H5P_RESULT_STORE_DB", raising=False)
+    monkeypatch.setattr(result_store, "_store", ResultStore())
+    previous = clients._transcript_api
+    clients.set_transcript_api(FakeTranscriptApi)
+    FakeTranscriptApi.configure()
+    yield
+    clients.set_transcript_api(previous)
+
+
+async def _call(app, method: str, path: str, body: dict = None, headers=()) -> tuple[int, dict, bytes]:
+    sent = []
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b'',
+                 'more_body': False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def _events(body: bytes) -> list[str]:
+    return [line[len("event: "):] for line in body.decode('utf-8').splitlines() if line.startswith("event: ")]
+
+
+def _app(**options):
+    client = FakeOpenAI(latency=0)
+    return api.create_app(client_factory=lambda api_key: client, max_workers=2, **options)
+
+
+def test_job_runs_to_a_downloadable_package():
+    async def scenario():
+        app = _app()
+        status, _, body = await _call(app, 'POST', '/jobs', {'url': URL, 'content_types': ['mcq', 'drag']}, AUTH)
+        assert status == 202
+        job_id = json.loads(body)['job_id']
+
+        status, headers, body = await _call(app, 'GET', f'/jobs/{job_id}/events')
+        assert status == 200
+        assert headers[b'content-type'] == b'text/event-stream'
+        assert _events(body) == ['queued', 'generating', 'packaging', 'finished']
+
+        status, _, body = await _call(app, 'GET', f'/jobs/{job_id}')
+        summary = json.loads(body)
+        assert summary['status'] == 'finished'
+        assert summary['topic']
+
+        status, headers, body = await _call(app, 'GET', f'/jobs/{job_id}/package')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/zip'
+        assert int(headers[b'content-length']) == len(body)
+        with zipfile.ZipFile(io.BytesIO(body)) as package:
+            assert json.loads(package.read("h5p.json"))['title'] == summary['topic']
+            assert "content/content.json" in package.namelist()
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_reports_the_error():
+    def failing_factory(api_key):
+        raise Exception("Backend unavailable")
+
+    async def scenario():
+        app = api.create_app(client_factory=failing_factory, max_workers=1)
+        _, _, body = await _call(app, 'POST', '/jobs', {'url': URL}, AUTH)
+        job_id = json.loads(body)['job_id']
+
+        _, _, body = await _call(app, 'GET', f'/jobs/{job_id}/events')
+        assert _events(body) == ['queued', 'generating', 'failed']
+
+        status, _, body = await _call(app, 'GET', f'/jobs/{job_id}/package')
+        assert status == 409
+        assert json.loads(body)['error'] == "Backend unavailable"
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("request_body, message", [
+    ({'url': "https://example.com/video"}, "Invalid request"),
+    ({'url': URL, 'content_types': ['mcq', 'quiz']}, "Unknown content types: quiz"),
+    ({'url': URL, 'backend': 'nope'}, "Unknown backend: nope"),
+    ({'url': URL, 'language': "de; rm -rf"}, "Invalid transcript language"),
+    ({'url': URL, 'locale': "xx"}, "Unknown locale: xx"),
+])
+def test_invalid_requests_are_rejected(request_body, message):
+    status, _, body = asyncio.run(_call(_app(), 'POST', '/jobs', request_body, AUTH))
+
+    assert status == 400
+    assert message in json.loads(body)['error']
+
+
+def test_openai_backend_requires_a_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    status, _, _ = asyncio.run(_call(_app(), 'POST', '/jobs', {'url': URL, 'backend': 'openai'}))
+
+    assert status == 401
+
+
+def test_unknown_job_is_404():
+    status, _, _ = asyncio.run(_call(_app(), 'GET', '/jobs/missing/package'))
+
+    assert status == 404
+
+
+def test_pending_jobs_are_limited():
+    release = threading.Event()
+    client = FakeOpenAI(latency=0)
+
+    def blocking_factory(api_key):
+        release.wait(timeout=10)
+        return client
+
+    async def scenario():
+        app = api.create_app(client_factory=blocking_factory, max_workers=1, max_pending=1)
+        status, _, body = await _call(app, 'POST', '/jobs', {'url': URL}, AUTH)
+        assert status == 202
+        job_id = json.loads(body)['job_id']
+
+        status, _, _ = await _call(app, 'POST', '/jobs', {'url': URL}, AUTH)
+        assert status == 429
+
+        release.set()
+        _, _, body = await _call(app, 'GET', f'/jobs/{job_id}/events')
+        assert _events(body)[-1] == 'finished'
+        # Finished jobs do not count against the limit
+        status, _, _ = await _call(app, 'POST', '/jobs', {'url': URL}, AUTH)
+        assert status == 202
+
+        # Running jobs are referenced until they finish
+        assert app._tasks
+        await asyncio.gather(*app._tasks)
+        await asyncio.sleep(0)
+        assert not app._tasks
+
+    asyncio.run(scenario())
@@ -0,0 +1,161 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from artifact_store import ArtifactStore
+from resources import GENERATED_ENTRIES, TEMPLATE_ZIP_PATH
+
+CONTENT_JSON = json.dumps({"content": [{"text": "Grüezi"}]}, ensure_ascii=False)
+H5P_JSON = json.dumps({"title": "Photosynthese", "language": "de"})
+
+
+def _zip(members: dict, compression=zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as zip_file:
+        for name, data in members.items():
+            zip_file.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _members(package: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(package)) as zip_file:
+        assert zip_file.testzip() is None
+        return {info.filename: zip_file.read(info) for info in zip_file.infolist()}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "store"))
+
+
+@pytest.fixture
+def template_zip(tmp_path):
+    path = tmp_path / "template.zip"
+    path.write_bytes(_zip({
+        "h5p.json": "{}",
+        "content/content.json": "{}",
+        "H5P.Column-1.16/library.json": json.dumps({"machineName": "H5P.Column"}),
+        "H5P.Column-1.16/scripts/column.js": "var H5P = H5P || {};\n" * 500,
+        "H5P.DragText-1.10/language/de-ä.json": "{}",
+    }))
+    return str(path)
+
+
+def test_put_generated_round_trip(store, template_zip):
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, "unit.h5p", template_zip)
+
+    package = store.get_package(package_id)
+    members = _members(package)
+
+    assert members["content/content.json"].decode('utf-8') == CONTENT_JSON
+    assert members["h5p.json"].decode('utf-8') == H5P_JSON
+    assert members["H5P.Column-1.16/scripts/column.js"] == b"var H5P = H5P || {};\n" * 500
+    assert "H5P.DragText-1.10/language/de-ä.json" in members
+    assert len(package) == store.get_manifest(package_id)['size']
+
+
+def test_put_generated_with_real_template(store):
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, template_zip_path=TEMPLATE_ZIP_PATH)
+
+    package = store.get_package(package_id)
+    with zipfile.ZipFile(TEMPLATE_ZIP_PATH) as template:
+        expected = set(template.namelist()) | set(GENERATED_ENTRIES)
+
+    assert set(_members(package)) == expected
+    assert len(package) == store.get_manifest(package_id)['size']
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_put_package_round_trip(store, compression):
+    members = {
+        "h5p.json": H5P_JSON.encode(),
+        "content/content.json": CONTENT_JSON.encode('utf-8'),
+        "H5P.MultiChoice-1.16/library.json": b'{"machineName": "H5P.MultiChoice"}',
+        "H5P.MultiChoice-1.16/images/ö.svg": b"<svg/>" * 100,
+    }
+    package_id = store.put_package(_zip(members, compression), "import.h5p")
+
+    package = store.get_package(package_id)
+
+    assert _members(package) == members
+    assert len(package) == store.get_manifest(package_id)['size']
+    assert store.get_manifest(package_id)['title'] == "Photosynthese"
+    assert store.read_json(package_id) == (json.loads(CONTENT_JSON), json.loads(H5P_JSON))
+
+
+def test_stored_package_is_deduplicated(store, template_zip):
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, template_zip_path=template_zip)
+    blobs = sorted(os.listdir(os.path.join(store.root, "blobs")))
+
+    # Importing the reassembled package again yields the same package and no new blobs
+    assert store.put_package(store.get_package(package_id)) == package_id
+    assert sorted(os.listdir(os.path.join(store.root, "blobs"))) == blobs
+
+
+def test_iter_package_streams_in_chunks(store, template_zip):
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, template_zip_path=template_zip)
+
+    chunks = list(store.iter_package(package_id, chunk_size=256))
+
+    assert max(len(chunk) for chunk in chunks[:-1]) <= 256 + 64
+    assert b''.join(chunks) == store.get_package(package_id)
+
+
+def test_gc_keeps_referenced_blobs(store, template_zip):
+    kept_id = store.put_generated(CONTENT_JSON, H5P_JSON, template_zip_path=template_zip)
+    deleted_id = store.put_generated(json.dumps({"content": []}), json.dumps({"title": "Weg"}),
+                                     template_zip_path=template_zip)
+    kept_package = store.get_package(kept_id)
+
+    store.delete(deleted_id)
+    stats = store.gc(grace_seconds=0)
+
+    # Only the two generated members of the deleted package were unreferenced
+    assert stats['removed_blobs'] == 2
+    assert stats['removed_layers'] == 0
+    assert store.get_package(kept_id) == kept_package
+    with pytest.raises(Exception):
+        store.get_manifest(deleted_id)
+
+
+def test_gc_grace_period_keeps_recent_blobs(store, template_zip):
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, template_zip_path=template_zip)
+    store.delete(package_id)
+
+    assert store.gc(grace_seconds=3600)['removed_blobs'] == 0
+    assert store.gc(grace_seconds=0)['removed_layers'] == 1
+
+
+def test_invalid_ids_are_rejected(store):
+    with pytest.raises(Exception):
+        store.get_manifest("../../etc/passwd")
+
+
+def _get(app, path: str) -> tuple[int, dict, bytes]:
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({'type': 'http', 'method': 'GET', 'path': path, 'headers': []}, receive, send))
+    headers = dict(sent[0]['headers'])
+    return sent[0]['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_api_content_length_matches_streamed_package(store, template_zip, monkeypatch):
+    api = pytest.importorskip("api")
+    monkeypatch.setenv("H5P_ARTIFACT_STORE_DIR", store.root)
+    package_id = store.put_generated(CONTENT_JSON, H5P_JSON, "unit.h5p", template_zip)
+
+    status, headers, body = _get(api.create_app(max_workers=1), f"/packages/{package_id}")
+
+    assert status == 200
+    assert int(headers[b'content-length']) == len(body)
+    assert _members(body)["h5p.json"].decode() == H5P_JSON
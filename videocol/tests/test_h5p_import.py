@@ -0,0 +1,63 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+import app
+from benchmarks.fakes import FakeOpenAI, make_transcript
+from h5p_import import import_h5p_package
+
+URL = "https://www.youtube.com/watch?v=abcdefghijk&t=90s"
+FIELDS = ('mcq', 'glossary', 'drag', 'welcome', 'topic', 'url', 'locale')
+
+
+@pytest.fixture(scope="module")
+def results():
+    transcript = " ".join(entry['text'] for entry in make_transcript(600))
+    return app.generate_results(FakeOpenAI(latency=0), transcript, URL,
+                                generate_mcq=True, generate_glossary=True, generate_drag=True)
+
+
+def _zip(members: dict) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        for name, data in members.items():
+            package.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_generated_package_round_trip(results):
+    imported = import_h5p_package(io.BytesIO(app.package_results(results)))
+
+    assert {field: imported[field] for field in FIELDS} == {field: results[field] for field in FIELDS}
+
+
+def test_localized_package_round_trip(results):
+    localized = app.localize_results(FakeOpenAI(latency=0), results, "fr")
+
+    imported = import_h5p_package(io.BytesIO(app.package_results(localized)))
+
+    assert {field: imported[field] for field in FIELDS} == {field: localized[field] for field in FIELDS}
+
+
+def test_package_with_only_some_sections(results):
+    partial = {**results, 'glossary': None, 'mcq': None}
+
+    imported = import_h5p_package(io.BytesIO(app.package_results(partial)))
+
+    assert imported['mcq'] is None and imported['glossary'] is None
+    assert imported['drag'] == results['drag']
+
+
+def test_package_without_h5p_json_is_rejected():
+    package = _zip({"content/content.json": json.dumps({"content": []})})
+
+    with pytest.raises(Exception, match="Not a package created by this tool"):
+        import_h5p_package(package)
+
+
+def test_invalid_zip_is_rejected():
+    with pytest.raises(Exception, match="Failed to read H5P package"):
+        import_h5p_package(io.BytesIO(b"not a zip file"))
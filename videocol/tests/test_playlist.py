@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from playlist import (PlaylistBackend, StubPlaylistBackend, YtDlpPlaylistBackend, expand_videos,
+                      get_playlist_backend, is_channel_url, playlist_key)
+
+BACKEND = StubPlaylistBackend({
+    "PL123": ["aaaaaaaaaaa", "bbbbbbbbbbb", "aaaaaaaaaaa", "ccccccccccc"],
+    "@channel": ["ddddddddddd", "eeeeeeeeeee"],
+})
+
+
+def test_playlist_is_expanded_without_duplicates():
+    assert expand_videos("https://www.youtube.com/playlist?list=PL123", BACKEND) == \
+        ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]
+
+
+def test_limit():
+    assert expand_videos("https://www.youtube.com/playlist?list=PL123", BACKEND, limit=2) == \
+        ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+
+
+def test_channel_is_expanded():
+    assert is_channel_url("https://www.youtube.com/@channel/videos")
+    assert playlist_key("https://www.youtube.com/@channel/videos") == "@channel"
+    assert expand_videos("https://www.youtube.com/@channel", BACKEND) == ["ddddddddddd", "eeeeeeeeeee"]
+
+
+def test_single_video_needs_no_backend():
+    assert expand_videos("https://youtu.be/fffffffffff", backend=None) == ["fffffffffff"]
+
+
+def test_unknown_playlist():
+    with pytest.raises(Exception):
+        expand_videos("https://www.youtube.com/playlist?list=PLmissing", BACKEND)
+
+
+def test_backend_from_environment(tmp_path, monkeypatch):
+    stub_file = tmp_path / "playlists.json"
+    stub_file.write_text(json.dumps({"PL123": ["aaaaaaaaaaa"]}))
+    monkeypatch.setenv("H5P_PLAYLIST_BACKEND", "stub")
+    monkeypatch.setenv("H5P_PLAYLIST_STUB_FILE", str(stub_file))
+
+    assert isinstance(get_playlist_backend(), StubPlaylistBackend)
+    assert expand_videos("https://www.youtube.com/playlist?list=PL123") == ["aaaaaaaaaaa"]
+    assert isinstance(get_playlist_backend("yt-dlp"), YtDlpPlaylistBackend)
+    with pytest.raises(Exception):
+        get_playlist_backend("unknown")
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PlaylistBackend()
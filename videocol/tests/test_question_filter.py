@@ -0,0 +1,124 @@
+import random
+import statistics
+
+from app import build_dragtext, build_multichoice
+from question_filter import (filter_glossary, filter_questions, minhash, shingles, signature_similarity,
+                             top_up_instruction)
+
+WORDS = "energie zweite krieg zelle begann die licht umwelt pflanze atp wasser sonne".split()
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b)
+
+
+def _question(text: str, correct: str = "Mitochondrien") -> dict:
+    return build_multichoice(text, [(correct, True, "Richtig."), ("Ribosomen", False, "Falsch.")])
+
+
+def test_minhash_estimates_jaccard():
+    rng = random.Random(1)
+    errors = []
+    for _ in range(500):
+        a = shingles(" ".join(rng.choice(WORDS) for _ in range(8)))
+        b = shingles(" ".join(rng.choice(WORDS) for _ in range(8)))
+        errors.append(signature_similarity(minhash(a), minhash(b)) - _jaccard(a, b))
+
+    # 64 independent hashes give a standard error of at most 0.5 / sqrt(64)
+    assert abs(statistics.mean(errors)) < 0.02
+    assert statistics.pstdev(errors) < 0.07
+    assert max(abs(error) for error in errors) < 0.3
+
+
+def test_minhash_of_dissimilar_texts():
+    a = shingles("energie zweite energie krieg zelle begann die begann")
+    b = shingles("energie krieg licht umwelt zweite begann begann begann")
+
+    assert abs(signature_similarity(minhash(a), minhash(b)) - _jaccard(a, b)) < 0.2
+
+
+def test_minhash_of_identical_and_empty_texts():
+    signature = minhash(shingles("Was ist Photosynthese?"))
+
+    assert signature_similarity(signature, minhash(shingles("was ist photosynthese"))) == 1.0
+    assert minhash(set()) == minhash(set())
+
+
+def test_filter_questions_drops_near_duplicates():
+    questions = [
+        _question("Welche Organellen gelten als Kraftwerke der Zelle?"),
+        _question("Welche Organellen gelten als die Kraftwerke der Zelle?"),
+        _question("Was wandeln Pflanzen bei der Photosynthese um?", "Sonnenlicht in Energie"),
+        _question("Welcher Stoff dient als Energieträger der Zelle?", "ATP"),
+    ]
+
+    kept, deficit = filter_questions(questions, target=4)
+
+    assert [q['params']['question'] for q in kept] == [
+        "Welche Organellen gelten als Kraftwerke der Zelle?",
+        "Was wandeln Pflanzen bei der Photosynthese um?",
+        "Welcher Stoff dient als Energieträger der Zelle?",
+    ]
+    assert deficit == 1
+
+
+def test_filter_questions_keeps_distinct_questions():
+    questions = [
+        _question("Was beschreibt ein Ökosystem?", "Lebewesen und ihre Umwelt"),
+        _question("Warum sind Pflanzen für Nahrungsketten zentral?", "Sie produzieren Biomasse"),
+        _question("Wieso benötigen Muskelzellen viele Mitochondrien?", "Hoher Energiebedarf"),
+        _question("Welche Folge hätte fehlendes Licht für Pflanzen?", "Keine Zuckerproduktion"),
+        _question("Wie hängen Atmung und Photosynthese zusammen?", "Sie bilden einen Stoffkreislauf"),
+    ]
+
+    assert filter_questions(questions, target=5) == (questions, 0)
+
+
+def test_filter_questions_drops_malformed_questions():
+    no_correct = build_multichoice("Was ist ATP?", [("Ein Zucker", False, "Falsch."), ("Ein Salz", False, "Falsch.")])
+    no_feedback = build_multichoice("Was ist ein Gen?", [("Ein DNA-Abschnitt", True, ""), ("Ein Protein", False, "x")])
+    valid = _question("Welche Organellen gelten als Kraftwerke der Zelle?")
+
+    assert filter_questions([no_correct, no_feedback, valid], target=2) == ([valid], 1)
+
+
+def test_filter_glossary_drops_repeated_terms_and_duplicate_definitions():
+    glossary = build_dragtext([
+        "*Photosynthese:Beginnt mit P*: Umwandlung von Licht in chemische Energie durch Pflanzen.",
+        "*photosynthese:Beginnt mit p*: Ein anderer Text über dasselbe Wort.",
+        "*Fotosynthese:Beginnt mit F*: Umwandlung von Licht in chemische Energie durch die Pflanzen.",
+        "*Mitochondrien:Beginnt mit M*: Organellen, die der Zelle Energie in Form von ATP liefern.",
+        "kein Glossareintrag",
+    ], 'glossaryTaskDescription')
+
+    filtered, removed = filter_glossary(glossary)
+
+    assert filtered['textField'].split("\n") == [
+        "*Photosynthese:Beginnt mit P*: Umwandlung von Licht in chemische Energie durch Pflanzen.",
+        "*Mitochondrien:Beginnt mit M*: Organellen, die der Zelle Energie in Form von ATP liefern.",
+    ]
+    assert removed == 3
+    assert filtered['taskDescription'] == glossary['taskDescription']
+
+
+def test_filter_glossary_keeps_distinct_entries():
+    glossary = build_dragtext([
+        "*Ökosystem:Beginnt mit Ö*: Zusammenspiel von Lebewesen und ihrer Umwelt.",
+        "*ATP:Drei Buchstaben*: Energieträger, der in den Mitochondrien gebildet wird.",
+        "*Chlorophyll:Beginnt mit C*: Grüner Farbstoff, der Licht absorbiert.",
+    ], 'glossaryTaskDescription')
+
+    assert filter_glossary(glossary) == (glossary, 0)
+
+
+def test_filter_glossary_without_matching_lines_is_unfiltered():
+    glossary = build_dragtext(["Begriff - Definition", "Noch ein Begriff - Definition"], 'glossaryTaskDescription')
+
+    assert filter_glossary(glossary) == (glossary, 0)
+
+
+def test_top_up_instruction_lists_existing_questions():
+    instruction = top_up_instruction(3, [_question("Was ist ATP?")])
+
+    assert "EXACTLY 3 additional questions" in instruction
+    assert instruction.endswith("existing questions:\n- Was ist ATP?\n")
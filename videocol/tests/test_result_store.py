@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from result_store import ResultStore, make_key, make_translation_key
+
+
+def _run_concurrently(count: int, func) -> list:
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(index):
+        barrier.wait()
+        results[index] = func()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_make_key_ignores_content_type_order():
+    assert make_key("vid", "de", "m", ["mcq", "drag"], "p") == make_key("vid", "de", "m", ["drag", "mcq"], "p")
+    assert make_key("vid", "de", "m", ["mcq"], "p") != make_key("vid", "de", "m", ["mcq"], "p2")
+
+
+def test_translation_key_depends_on_content_and_locale():
+    results = {'topic': "Thema", 'locale': "de"}
+    key = make_translation_key(results, "fr", "m", "p")
+    assert key == make_translation_key(dict(results), "fr", "m", "p")
+    assert key != make_translation_key(results, "it", "m", "p")
+    assert key != make_translation_key({**results, 'topic': "Anderes Thema"}, "fr", "m", "p")
+
+
+def test_concurrent_callers_share_one_computation():
+    store = ResultStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'value': 42}
+
+    results = _run_concurrently(8, lambda: store.get_or_compute("key", compute))
+
+    assert len(calls) == 1
+    assert all(value == {'value': 42} for value, _ in results)
+    assert sorted(outcome for _, outcome in results) == ['miss'] + ['shared'] * 7
+    assert store.get_or_compute("key", compute) == ({'value': 42}, 'hit')
+
+
+def test_errors_reach_every_waiter_and_are_not_stored():
+    store = ResultStore()
+
+    def compute():
+        time.sleep(0.2)
+        raise Exception("generation failed")
+
+    def call():
+        try:
+            store.get_or_compute("key", compute)
+        except Exception as e:
+            return str(e)
+
+    assert _run_concurrently(4, call) == ["generation failed"] * 4
+    assert store.get("key") is None
+
+
+def test_values_that_are_not_cacheable_are_shared_but_not_stored():
+    store = ResultStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'degraded': True}
+
+    results = _run_concurrently(3, lambda: store.get_or_compute("key", compute, cacheable=lambda value: False))
+
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in results) == ['miss', 'shared', 'shared']
+    assert store.get("key") is None
+    assert store.get_or_compute("key", compute)[1] == 'miss'
+
+
+def test_memory_is_bounded():
+    store = ResultStore(max_entries=2)
+    for key in ("a", "b", "c"):
+        store.put(key, key)
+
+    assert store.get("a") is None
+    assert store.get("c") == "c"
+
+
+def test_values_expire(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    store = ResultStore(db_path=db_path, ttl_seconds=0.2)
+    store.put("old", 1)
+    time.sleep(0.3)
+
+    assert store.get("old") is None
+    assert ResultStore(db_path=db_path, ttl_seconds=0.2).get("old") is None
+
+    store.put("new", 2)
+    with sqlite3.connect(db_path) as db:
+        assert [row[0] for row in db.execute("SELECT key FROM results")] == ["new"]
+
+
+def test_sqlite_values_are_shared_between_stores(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultStore(db_path=db_path).get_or_compute("key", lambda: {'value': 1})
+
+    # A second store stands in for another process
+    assert ResultStore(db_path=db_path).get_or_compute("key", lambda: pytest.fail("recomputed")) == ({'value': 1}, 'hit')
+
+
+def test_lease_makes_other_processes_wait(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    first = ResultStore(db_path=db_path, poll_interval=0.05)
+    second = ResultStore(db_path=db_path, poll_interval=0.05)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return {'value': 'first'}
+
+    thread = threading.Thread(target=first.get_or_compute, args=("key", slow))
+    thread.start()
+    started.wait(timeout=5)
+
+    value, outcome = second.get_or_compute("key", lambda: pytest.fail("computed twice"))
+    thread.join()
+
+    assert (value, outcome) == ({'value': 'first'}, 'shared')
+
+
+def test_stale_lease_is_taken_over(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    store = ResultStore(db_path=db_path, lease_seconds=0.2, poll_interval=0.05)
+    # A process that died while holding the lease
+    with sqlite3.connect(db_path) as db:
+        db.execute("INSERT INTO inflight (key, owner, started) VALUES (?, ?, ?)", ("key", "dead", time.time()))
+
+    value, outcome = store.get_or_compute("key", lambda: {'value': 'recovered'})
+
+    assert (value, outcome) == ({'value': 'recovered'}, 'miss')
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM inflight").fetchone()[0] == 0
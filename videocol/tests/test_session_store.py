@@ -0,0 +1,121 @@
+import os
+import time
+
+import pytest
+
+from metrics import metrics
+from session_store import SessionData, SessionStore
+
+SMALL = {'topic': "Photosynthese"}
+LARGE = b"x" * 2048
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(spill_dir=str(tmp_path), spill_bytes=1024, memory_limit_bytes=5000,
+                        session_quota_bytes=7000, idle_seconds=10)
+
+
+def _gauge(name: str) -> float:
+    return metrics._gauges[(name, ())]
+
+
+def _spilled(store: SessionStore, session_id: str) -> list[str]:
+    session_dir = os.path.join(store._spill_dir, session_id)
+    return sorted(os.listdir(session_dir)) if os.path.isdir(session_dir) else []
+
+
+def test_small_values_stay_in_memory(store):
+    store.put("a", "results", SMALL)
+
+    assert store.get("a", "results") == SMALL
+    assert _spilled(store, "a") == []
+
+
+def test_large_values_are_spilled_to_disk(store):
+    store.put("a", "package", LARGE)
+    store.put("a", "transcript", "Wort " * 400)
+
+    assert _spilled(store, "a") == ["package.bytes", "transcript.json"]
+    assert store.get("a", "package") == LARGE
+    assert store.get("a", "transcript") == "Wort " * 400
+
+
+def test_least_recently_used_values_are_evicted_and_reloaded(store):
+    store.put("a", "first", LARGE)
+    store.put("a", "second", LARGE)
+    store.get("a", "first")
+    # The memory limit fits two payloads, the least recently used one is dropped
+    store.put("b", "third", LARGE)
+
+    assert store._sessions["a"]["second"].value is None
+    assert store._sessions["a"]["first"].value == LARGE
+    assert store.get("a", "second") == LARGE
+    assert store._sessions["a"]["second"].value == LARGE
+
+
+def test_session_quota(store):
+    store.put("a", "first", LARGE)
+    store.put("a", "second", LARGE)
+    store.put("a", "third", LARGE)
+
+    with pytest.raises(Exception, match="quota"):
+        store.put("a", "fourth", LARGE)
+    # Replacing a value only counts its new size, other sessions have their own quota
+    store.put("a", "third", b"y" * 2048)
+    store.put("b", "first", LARGE)
+    assert store.session_bytes("a") == 3 * 2048
+
+
+def test_idle_sessions_expire(store):
+    store.put("idle", "package", LARGE)
+    store.put("active", "results", SMALL)
+    store._last_access["idle"] = time.time() - 60
+    store._last_expiry = time.time() - 120
+
+    assert store.get("active", "results") == SMALL
+    assert not store.contains("idle", "package")
+    assert _spilled(store, "idle") == []
+
+
+def test_delete_and_drop_session(store):
+    store.put("a", "package", LARGE)
+    store.put("a", "results", SMALL)
+
+    store.put("a", "results", None)
+    assert store.get("a", "results", "gone") == "gone"
+
+    store.drop_session("a")
+    assert not store.contains("a", "package")
+    assert _spilled(store, "a") == []
+
+
+def test_gauges(store):
+    store.put("a", "results", SMALL)
+    store.put("a", "package", LARGE)
+    store.put("b", "package", LARGE)
+
+    assert _gauge('h5p_sessions_active') == 2
+    assert _gauge('h5p_session_disk_bytes') == 2 * len(LARGE)
+    # Spilled payloads are counted in memory too while they are cached
+    assert _gauge('h5p_session_memory_bytes') == 2 * len(LARGE) + store._sessions["a"]["results"].size
+
+    store.drop_session("b")
+    assert _gauge('h5p_sessions_active') == 1
+    assert _gauge('h5p_session_disk_bytes') == len(LARGE)
+
+
+def test_invalid_session_ids_are_rejected(store):
+    with pytest.raises(Exception, match="Invalid session id"):
+        store.put("../etc", "package", LARGE)
+
+
+def test_session_data_view(store):
+    session = SessionData(store, "a")
+    session.results = SMALL
+
+    assert 'results' in session
+    assert session.results == SMALL
+    assert session.get('missing') is None
+    with pytest.raises(AttributeError):
+        session.missing
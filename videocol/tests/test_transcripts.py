@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+import clients
+import transcripts
+from benchmarks.fakes import FakeTranscript, FakeTranscriptApi, FakeTranscriptList
+from transcripts import AUTO_LANGUAGE, fetch_transcript, get_transcript_text, prefetch_transcripts, rank_transcripts
+
+LANGUAGES = ["de", "en", "fr"]
+
+
+class BrokenTranscript(FakeTranscript):
+    """A listed transcript whose download fails."""
+
+    def fetch(self) -> list[dict]:
+        raise Exception(f"{self.language_code} unavailable")
+
+
+def _transcript(language_code: str, generated: bool, translatable: bool = True, cls=FakeTranscript):
+    return cls("vid", language_code, generated, 24, 0.0, LANGUAGES if translatable else None)
+
+
+def _plans(transcript_list, language: str) -> list[tuple]:
+    return [(plan.transcript.language_code, plan.transcript.is_generated, plan.translate_to)
+            for plan in rank_transcripts(transcript_list, language)]
+
+
+@pytest.fixture(autouse=True)
+def fake_api():
+    transcripts._listings.clear()
+    transcripts._transcripts.clear()
+    previous = clients._transcript_api
+    clients.set_transcript_api(FakeTranscriptApi)
+    FakeTranscriptApi.configure(word_count=24)
+    yield FakeTranscriptApi
+    clients.set_transcript_api(previous)
+    transcripts._listings.clear()
+    transcripts._transcripts.clear()
+
+
+def test_manual_transcript_comes_before_generated():
+    transcript_list = FakeTranscriptList("vid", [_transcript("de", True), _transcript("de", False)])
+
+    assert _plans(transcript_list, "de")[:2] == [("de", False, None), ("de", True, None)]
+
+
+def test_direct_transcripts_come_before_translations():
+    transcript_list = FakeTranscriptList("vid", [_transcript("en", False), _transcript("fr", True)])
+
+    assert _plans(transcript_list, "fr") == [("fr", True, None), ("en", False, "fr")]
+
+
+def test_translations_prefer_manual_transcripts():
+    transcript_list = FakeTranscriptList("vid", [_transcript("en", True), _transcript("de", False)])
+
+    assert _plans(transcript_list, "fr") == [("de", False, "fr"), ("en", True, "fr")]
+
+
+def test_auto_uses_the_spoken_language_without_translating():
+    transcript_list = FakeTranscriptList("vid", [
+        _transcript("fr", False), _transcript("en", True), _transcript("en", False),
+    ])
+
+    assert _plans(transcript_list, AUTO_LANGUAGE) == [("en", False, None), ("en", True, None), ("fr", False, None)]
+
+
+def test_no_matching_transcript():
+    transcript_list = FakeTranscriptList("vid", [_transcript("en", True, translatable=False)])
+
+    assert rank_transcripts(transcript_list, "de") == []
+
+
+def test_fetch_without_plans_raises(monkeypatch):
+    monkeypatch.setattr(FakeTranscriptApi, "list_transcripts", classmethod(
+        lambda cls, video_id: FakeTranscriptList(video_id, [_transcript("en", True, translatable=False)])))
+
+    with pytest.raises(Exception, match="No transcript available in 'de'"):
+        fetch_transcript("vid", "de")
+
+
+def test_fetch_falls_back_when_a_fetch_fails(monkeypatch):
+    monkeypatch.setattr(FakeTranscriptApi, "list_transcripts", classmethod(
+        lambda cls, video_id: FakeTranscriptList(video_id, [
+            _transcript("de", False, cls=BrokenTranscript), _transcript("de", True),
+        ])))
+
+    assert fetch_transcript("vid", "de")
+
+
+def test_fetch_reports_every_failed_plan(monkeypatch):
+    monkeypatch.setattr(FakeTranscriptApi, "list_transcripts", classmethod(
+        lambda cls, video_id: FakeTranscriptList(video_id, [
+            _transcript("de", False, translatable=False, cls=BrokenTranscript),
+            _transcript("de", True, translatable=False, cls=BrokenTranscript),
+        ])))
+
+    with pytest.raises(Exception, match="All transcript options failed: de unavailable; de unavailable"):
+        fetch_transcript("vid", "de")
+
+
+def test_listing_is_cached(fake_api):
+    fetch_transcript("vid", "de")
+    fetch_transcript("vid", "en")
+
+    assert fake_api.calls == 1
+
+
+def test_transcript_text_is_stored(monkeypatch):
+    text = get_transcript_text("vid", "de")
+    # A second request is answered from the store without fetching again
+    monkeypatch.setattr(transcripts, "fetch_transcript", lambda video_id, language: pytest.fail("fetched again"))
+
+    assert get_transcript_text("vid", "de") == text
+    assert text.startswith("Photosynthese ist der Prozess")
+
+
+def test_prefetch_is_bounded_and_reports_errors(fake_api, monkeypatch):
+    lock = threading.Lock()
+    running = [0, 0]  # current, maximum
+    list_transcripts = fake_api.list_transcripts
+
+    def slow_listing(cls, video_id):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        if video_id.startswith("missing"):
+            raise Exception("Video unavailable")
+        return list_transcripts(video_id)
+
+    monkeypatch.setattr(FakeTranscriptApi, "list_transcripts", classmethod(slow_listing))
+    video_ids = ["vid1", "missing1", "vid2", "vid3", "missing2", "vid4"]
+
+    errors = prefetch_transcripts(video_ids, "de", max_workers=2)
+
+    assert running[1] == 2
+    assert list(errors) == video_ids
+    assert errors["missing1"] == errors["missing2"] == "Video unavailable"
+    assert all(errors[video_id] is None for video_id in ["vid1", "vid2", "vid3", "vid4"])
+
+
+def test_prefetch_reports_in_completion_order(monkeypatch):
+    def fetch(video_id, language):
+        time.sleep(0.2 if video_id == "slow" else 0)
+        return [{'text': video_id}]
+
+    monkeypatch.setattr(transcripts, "fetch_transcript", fetch)
+    finished = []
+
+    prefetch_transcripts(["slow", "fast1", "fast2"], "de", on_done=lambda video_id, error: finished.append(video_id))
+
+    assert finished[-1] == "slow"
+    assert sorted(finished) == ["fast1", "fast2", "slow"]
+
+
+def test_prefetched_transcripts_are_served_from_the_store(monkeypatch):
+    prefetch_transcripts(["vid1", "vid2"], "de")
+    monkeypatch.setattr(transcripts, "fetch_transcript", lambda video_id, language: pytest.fail("fetched again"))
+
+    assert get_transcript_text("vid1", "de").startswith("Photosynthese")
+    assert get_transcript_text("vid2", "de")
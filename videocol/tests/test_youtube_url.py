@@ -0,0 +1,81 @@
+import pytest
+
+from youtube_url import VideoRef, canonical_url, extract_video_id, parse_start, parse_youtube_url, same_video
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    VIDEO_ID,
+    f"https://www.youtube.com/watch?v={VIDEO_ID}",
+    f"http://youtube.com/watch?feature=share&v={VIDEO_ID}",
+    f"www.youtube.com/watch?v={VIDEO_ID}",
+    f"https://m.youtube.com/watch?v={VIDEO_ID}",
+    f"https://music.youtube.com/watch?v={VIDEO_ID}&si=abc",
+    f"https://youtu.be/{VIDEO_ID}",
+    f"https://youtu.be/{VIDEO_ID}?si=tracking",
+    f"https://www.youtube.com/shorts/{VIDEO_ID}",
+    f"https://www.youtube.com/embed/{VIDEO_ID}?rel=0",
+    f"https://www.youtube-nocookie.com/embed/{VIDEO_ID}",
+    f"https://www.youtube.com/live/{VIDEO_ID}?feature=share",
+    f"https://www.youtube.com/v/{VIDEO_ID}",
+    f"  https://www.youtube.com/watch?v={VIDEO_ID}&list=PL123&index=4  ",
+])
+def test_video_id_from_common_url_forms(url):
+    assert extract_video_id(url) == VIDEO_ID
+
+
+@pytest.mark.parametrize("url, start", [
+    (f"https://youtu.be/{VIDEO_ID}?t=90", 90),
+    (f"https://www.youtube.com/watch?v={VIDEO_ID}&t=1m30s", 90),
+    (f"https://www.youtube.com/watch?v={VIDEO_ID}&t=1h2m3s", 3723),
+    (f"https://www.youtube.com/embed/{VIDEO_ID}?start=42", 42),
+    (f"https://youtu.be/{VIDEO_ID}#t=15", 15),
+    (f"https://youtu.be/{VIDEO_ID}", None),
+])
+def test_start_time(url, start):
+    assert parse_youtube_url(url).start == start
+
+
+@pytest.mark.parametrize("value, seconds", [("90", 90), ("90s", 90), ("2m", 120), ("1h", 3600), ("", None), ("x", None)])
+def test_parse_start(value, seconds):
+    assert parse_start(value) == seconds
+
+
+def test_playlist_url():
+    ref = parse_youtube_url("https://www.youtube.com/playlist?list=PL123")
+
+    assert ref == VideoRef(playlist="PL123")
+    assert ref.canonical_url == "https://www.youtube.com/playlist?list=PL123"
+    with pytest.raises(Exception):
+        extract_video_id("https://www.youtube.com/playlist?list=PL123")
+
+
+@pytest.mark.parametrize("url, expected", [
+    (f"https://youtu.be/{VIDEO_ID}?si=tracking", f"https://www.youtube.com/watch?v={VIDEO_ID}"),
+    (f"https://www.youtube.com/watch?v={VIDEO_ID}&list=PL123&index=4", f"https://www.youtube.com/watch?v={VIDEO_ID}"),
+    (f"https://www.youtube.com/shorts/{VIDEO_ID}", f"https://www.youtube.com/watch?v={VIDEO_ID}"),
+    (f"https://youtu.be/{VIDEO_ID}?t=90", f"https://www.youtube.com/watch?v={VIDEO_ID}&t=90s"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+    assert extract_video_id(canonical_url(url)) == VIDEO_ID
+
+
+@pytest.mark.parametrize("url", [
+    "https://vimeo.com/12345",
+    "https://www.youtube.com/watch?v=tooshort",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ!",
+    "https://www.youtube.com/",
+    "https://youtu.be/",
+    "",
+])
+def test_invalid_urls(url):
+    with pytest.raises(Exception):
+        extract_video_id(url)
+
+
+def test_same_video():
+    assert same_video(f"https://youtu.be/{VIDEO_ID}?t=10", f"https://www.youtube.com/watch?v={VIDEO_ID}")
+    assert not same_video(f"https://youtu.be/{VIDEO_ID}", "https://youtu.be/aaaaaaaaaaa")
+    assert not same_video("not a url", "not a url")
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from clients import get_transcript_api
+
+logger = logging.getLogger(__name__)
+
+# Language option meaning "whatever the video was recorded in"
+AUTO_LANGUAGE = "auto"
+
+# Transcript listings are cached per video for this long
+LISTING_TTL_SECONDS = 3600
+LISTING_CACHE_SIZE = 512
+
+# Fetched transcripts kept per (video, language), filled by prefetch and by normal requests
+TRANSCRIPT_CACHE_SIZE = 256
+
+
+@dataclass
+class TranscriptPlan:
+    """One way of obtaining a transcript, in order of preference."""
+    transcript: object  # youtube_transcript_api Transcript
+    translate_to: str = None
+    reason: str = ""
+
+    def fetch(self) -> list[dict]:
+        transcript = self.transcript
+        if self.translate_to:
+            transcript = transcript.translate(self.translate_to)
+        return transcript.fetch()
+
+
+_listing_lock = threading.Lock()
+_listings = OrderedDict()  # video_id -> (fetched_at, transcript_list)
+
+
+def list_transcripts(video_id: str):
+    """TranscriptList of a video, cached so repeated requests skip the listing round trip."""
+    now = time.monotonic()
+    with _listing_lock:
+        cached = _listings.get(video_id)
+        if cached and now - cached[0] < LISTING_TTL_SECONDS:
+            _listings.move_to_end(video_id)
+            return cached[1]
+
+    transcript_list = get_transcript_api().list_transcripts(video_id)
+    with _listing_lock:
+        _listings[video_id] = (now, transcript_list)
+        _listings.move_to_end(video_id)
+        while len(_listings) > LISTING_CACHE_SIZE:
+            _listings.popitem(last=False)
+    return transcript_list
+
+
+def _can_translate_to(transcript, language: str) -> bool:
+    if transcript.language_code == language:
+        return False
+    return transcript.is_translatable and any(
+        entry['language_code'] == language for entry in transcript.translation_languages
+    )
+
+
+def rank_transcripts(transcript_list, language: str) -> list[TranscriptPlan]:
+    """
+    Rank the ways to obtain a transcript in `language`.
+
+    Each plan costs a single fetch; direct transcripts come before YouTube
+    translations, and within each group manually created transcripts come
+    before auto-generated ones. For "auto" the original language is used and
+    nothing is translated: the auto-generated track follows the spoken
+    language, so a manual transcript in that language is preferred, then the
+    generated track itself, then any other manual transcript.
+    """
+    transcripts = list(transcript_list)
+    manual = [t for t in transcripts if not t.is_generated]
+    generated = [t for t in transcripts if t.is_generated]
+
+    if language == AUTO_LANGUAGE:
+        spoken = {t.language_code for t in generated}
+        plans = [TranscriptPlan(t, reason="manual, original language") for t in manual if t.language_code in spoken]
+        plans += [TranscriptPlan(t, reason="generated, original language") for t in generated]
+        plans += [TranscriptPlan(t, reason="manual") for t in manual if t.language_code not in spoken]
+        return plans
+
+    plans = [TranscriptPlan(t, reason="manual") for t in manual if t.language_code == language]
+    plans += [TranscriptPlan(t, reason="generated") for t in generated if t.language_code == language]
+    plans += [TranscriptPlan(t, translate_to=language, reason=f"manual {t.language_code}, translated")
+              for t in manual if _can_translate_to(t, language)]
+    plans += [TranscriptPlan(t, translate_to=language, reason=f"generated {t.language_code}, translated")
+              for t in generated if _can_translate_to(t, language)]
+    return plans
+
+
+def fetch_transcript(video_id: str, language: str) -> list[dict]:
+    """Fetch the best available transcript, falling back to the next plan if a fetch fails."""
+    plans = rank_transcripts(list_transcripts(video_id), language)
+    if not plans:
+        raise Exception(f"No transcript available in '{language}' and none can be translated to it")
+
+    errors = []
+    for plan in plans:
+        try:
+            entries = plan.fetch()
+            logger.info(f"Transcript for {video_id}: {plan.transcript.language_code} ({plan.reason})")
+            return entries
+        except Exception as e:
+            logger.warning(f"Transcript plan '{plan.reason}' failed for {video_id}: {e}")
+            errors.append(str(e))
+    raise Exception(f"All transcript options failed: {'; '.join(errors)}")
+
+
+_transcript_lock = threading.Lock()
+_transcripts = OrderedDict()  # (video_id, language) -> transcript text
+
+
+def get_transcript_text(video_id: str, language: str) -> str:
+    """Transcript as one string, served from the transcript store when it was fetched before."""
+    key = (video_id, language)
+    with _transcript_lock:
+        if key in _transcripts:
+            _transcripts.move_to_end(key)
+            return _transcripts[key]
+
+    text = " ".join(entry['text'] for entry in fetch_transcript(video_id, language))
+    with _transcript_lock:
+        _transcripts[key] = text
+        _transcripts.move_to_end(key)
+        while len(_transcripts) > TRANSCRIPT_CACHE_SIZE:
+            _transcripts.popitem(last=False)
+    return text
+
+
+def prefetch_transcripts(video_ids: list[str], language: str, max_workers: int = 8, on_done=None) -> dict:
+    """
+    Fetch transcripts for many videos in parallel into the transcript store.
+    Returns {video_id: error message or None}; `on_done(video_id, error)` is
+    called as each one finishes, e.g. to drive a progress bar.
+    """
+    def fetch(video_id):
+        try:
+            get_transcript_text(video_id, language)
+            return video_id, None
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {video_id}: {e}")
+            return video_id, str(e)
+
+    outcome = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(video_ids)))) as executor:
+        futures = [executor.submit(fetch, video_id) for video_id in video_ids]
+        for future in as_completed(futures):
+            video_id, error = future.result()
+            outcome[video_id] = error
+            if on_done:
+                on_done(video_id, error)
+    # In the order of `video_ids`, not of completion
+    return {video_id: outcome[video_id] for video_id in video_ids}
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlparse
+
+YOUTUBE_HOSTS = {
+    "youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+    "youtube-nocookie.com", "www.youtube-nocookie.com",
+}
+SHORT_HOSTS = {"youtu.be", "www.youtu.be"}
+
+# Path prefixes followed by the video ID, e.g. /shorts/<id>
+ID_PATH_PREFIXES = ("embed", "shorts", "v", "live", "e")
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_TIME_RE = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$")
+
+
+@dataclass(frozen=True)
+class VideoRef:
+    """Canonical form of a YouTube URL; equal refs mean the same video."""
+    video_id: str = None
+    start: int = None  # seconds
+    playlist: str = None
+
+    @property
+    def canonical_url(self) -> str:
+        """Watch URL of the video (with its start time), or the playlist URL; tracking parameters are dropped."""
+        if not self.video_id:
+            return f"https://www.youtube.com/playlist?list={self.playlist}"
+        if self.start:
+            return f"https://www.youtube.com/watch?v={self.video_id}&t={self.start}s"
+        return f"https://www.youtube.com/watch?v={self.video_id}"
+
+
+def parse_start(value: str):
+    """Seconds from t=/start= values like '90', '90s' or '1h2m3s'."""
+    match = _TIME_RE.match(value.strip().lower()) if value else None
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_youtube_url(url: str) -> VideoRef:
+    """
+    Parse any common YouTube URL form (watch, youtu.be, shorts, embed, live,
+    playlist, mobile/music hosts) or a bare 11-character video ID.
+    """
+    url = (url or "").strip()
+    if _VIDEO_ID_RE.match(url):
+        return VideoRef(video_id=url)
+
+    if "://" not in url:
+        url = "https://" + url
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split(":")[0]
+    query = parse_qs(parsed.query)
+    path_parts = [part for part in parsed.path.split("/") if part]
+
+    video_id = None
+    if host in SHORT_HOSTS:
+        video_id = path_parts[0] if path_parts else None
+    elif host in YOUTUBE_HOSTS:
+        if query.get("v"):
+            video_id = query["v"][0]
+        elif len(path_parts) >= 2 and path_parts[0] in ID_PATH_PREFIXES:
+            video_id = path_parts[1]
+    else:
+        raise Exception(f"Not a YouTube URL: {url}")
+
+    playlist = query.get("list", [None])[0]
+    if video_id is not None and not _VIDEO_ID_RE.match(video_id):
+        raise Exception(f"Invalid YouTube video ID: {video_id}")
+    if video_id is None and playlist is None:
+        raise Exception(f"No video or playlist found in URL: {url}")
+
+    start = parse_start(query.get("t", query.get("start", [None]))[0])
+    # youtu.be links may also carry the time in the fragment (#t=90)
+    if start is None and parsed.fragment.startswith("t="):
+        start = parse_start(parsed.fragment[2:])
+
+    return VideoRef(video_id=video_id, start=start, playlist=playlist)
+
+
+def extract_video_id(url: str) -> str:
+    """Canonical video ID of a URL; raises if the URL does not point at a single video."""
+    ref = parse_youtube_url(url)
+    if not ref.video_id:
+        raise Exception(f"URL points to a playlist, not a video: {url}")
+    return ref.video_id
+
+
+def canonical_url(url: str) -> str:
+    """Canonical form of a YouTube URL, e.g. youtu.be/x?si=... -> https://www.youtube.com/watch?v=x"""
+    return parse_youtube_url(url).canonical_url
+
+
+def same_video(url_a: str, url_b: str) -> bool:
+    """Whether two URLs refer to the same video, e.g. youtu.be/x and watch?v=x&t=10."""
+    try:
+        return extract_video_id(url_a) == extract_video_id(url_b)
+    except Exception:
+        return False